@@ -72,12 +72,29 @@ def range_fully_contain_the_other(range_1: List[int], range_2: List[int]) -> boo
     return set_1.issubset(set_2) or set_2.issubset(set_1)
 
 
+def parse_bounds(line: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Parse both assignments of a line as (first section, last section) pairs, without listing their sections."""
+    left, right = line.split(",")
+    start_left, end_left = map(int, left.split("-"))
+    start_right, end_right = map(int, right.split("-"))
+    return (start_left, end_left), (start_right, end_right)
+
+
+def bounds_fully_contain_the_other(bounds_1: Tuple[int, int], bounds_2: Tuple[int, int]) -> bool:
+    """Check if one range contains the other using only their endpoints.
+
+    Takes O(1) time and memory, however wide the ranges are.
+    """
+    (start_1, end_1), (start_2, end_2) = bounds_1, bounds_2
+    return (start_1 <= start_2 and end_2 <= end_1) or (start_2 <= start_1 and end_1 <= end_2)
+
+
 def main():
     result = 0
     with open("input.txt", "r") as f:
         for line in f.readlines():
-            range_left, range_right = parse_ranges(line)
-            if range_fully_contain_the_other(range_left, range_right):
+            bounds_left, bounds_right = parse_bounds(line)
+            if bounds_fully_contain_the_other(bounds_left, bounds_right):
                 result += 1
 
     print("Result:", result)
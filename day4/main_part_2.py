@@ -34,12 +34,29 @@ def ranges_intersect(range_1: List[int], range_2: List[int]) -> bool:
     return bool(set_1.intersection(set_2) or set_2.intersection(set_1))
 
 
+def parse_bounds(line: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Parse both assignments of a line as (first section, last section) pairs, without listing their sections."""
+    left, right = line.split(",")
+    start_left, end_left = map(int, left.split("-"))
+    start_right, end_right = map(int, right.split("-"))
+    return (start_left, end_left), (start_right, end_right)
+
+
+def bounds_intersect(bounds_1: Tuple[int, int], bounds_2: Tuple[int, int]) -> bool:
+    """Check if two ranges share at least one section using only their endpoints.
+
+    Takes O(1) time and memory, however wide the ranges are.
+    """
+    (start_1, end_1), (start_2, end_2) = bounds_1, bounds_2
+    return start_1 <= end_2 and start_2 <= end_1
+
+
 def main():
     result = 0
     with open("input.txt", "r") as f:
         for line in f.readlines():
-            range_left, range_right = parse_ranges(line)
-            if ranges_intersect(range_left, range_right):
+            bounds_left, bounds_right = parse_bounds(line)
+            if bounds_intersect(bounds_left, bounds_right):
                 result += 1
 
     print("Result:", result)
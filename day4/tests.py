@@ -1,6 +1,9 @@
+import random
 from unittest.mock import mock_open, patch
 
+from .main_part_1 import bounds_fully_contain_the_other, parse_bounds, parse_ranges, range_fully_contain_the_other
 from .main_part_1 import main as main_1
+from .main_part_2 import bounds_intersect, ranges_intersect
 from .main_part_2 import main as main_2
 
 TEST_INPUT = """
@@ -30,3 +33,22 @@ def test_part_2(mock_file):
 
     mock_file.assert_called_with("input.txt", "r")
     assert result == ANSWER_PART_2
+
+
+def test_bounds_checks_match_section_sets():
+    random.seed(4)
+    for _ in range(500):
+        start_1, start_2 = random.randint(1, 20), random.randint(1, 20)
+        line = f"{start_1}-{random.randint(start_1, 20)},{start_2}-{random.randint(start_2, 20)}"
+        bounds_left, bounds_right = parse_bounds(line)
+        range_left, range_right = parse_ranges(line)
+        assert bounds_fully_contain_the_other(bounds_left, bounds_right) == range_fully_contain_the_other(
+            range_left, range_right
+        )
+        assert bounds_intersect(bounds_left, bounds_right) == ranges_intersect(range_left, range_right)
+
+
+def test_bounds_checks_on_wide_ranges():
+    bounds_left, bounds_right = parse_bounds("1-50000000,49999999-99999999")
+    assert not bounds_fully_contain_the_other(bounds_left, bounds_right)
+    assert bounds_intersect(bounds_left, bounds_right)
@@ -68,14 +68,29 @@ After the rearrangement procedure completes, what crate ends up on top of each s
 
 https://adventofcode.com/2022/day/5
 """
-import re
-from typing import List, Optional
+import mmap
+import struct
+from collections import namedtuple
+from itertools import takewhile
+from typing import AnyStr, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # How many characters crate representations takes
 CRATE_REPR_LENGTH = 3
+# Crate representations are separated with a single space, so every crate starts this many characters after the previous
+CRATE_STRIDE = CRATE_REPR_LENGTH + 1
+# Every move line has the same words: "move <N> from <A> to <B>"
+MOVE_WORDS_NUMBER = 6
 
-CRATE_REGEX = re.compile(r"\[(?P<crate_name>[a-zA-Z])\]")
-MOVE_REGEX = re.compile(r"move (?P<crates_number>\d+) from (?P<source_stack>\d+) to (?P<dest_stack>\d+)")
+Move = Tuple[int, int, int]
+
+# Binary move log: magic bytes followed by fixed-width records (crates number, source stack, destination stack)
+MOVE_LOG_MAGIC = b"AOC5MOVE"
+MOVE_RECORD = struct.Struct("<III")
+
+# Summary of how much work was removed from the rearrangement procedure by ``compact_moves``
+CompactionStats = namedtuple(
+    "CompactionStats", ["moves_before", "moves_after", "crates_moved_before", "crates_moved_after"]
+)
 
 
 class Stack:
@@ -85,9 +100,20 @@ class Stack:
     def put(self, crate: str):
         self.crates.append(crate)
 
+    def put_many(self, crates: List[str]):
+        self.crates.extend(crates)
+
     def remove(self):
         return self.crates.pop() if self.crates else None
 
+    def remove_many(self, n=1):
+        """Remove ``n`` crates from the top, keeping their order. Costs O(n), the rest of the stack is not copied."""
+        if n <= 0:
+            return []
+        crates_removed = self.crates[-n:]
+        del self.crates[-n:]
+        return crates_removed
+
     def get_top(self):
         return self.crates[-1]
 
@@ -104,26 +130,13 @@ class Stack:
         return self.repr(vertical=False)
 
 
-def line_splitter(line: str):
-    """Split line (by space char) into string parts with a given length (CRATE_REPR_LENGTH)."""
-    pos_start = 0
-    line = line.replace("\n", "")
-    pos_end = pos_start + CRATE_REPR_LENGTH
-    while pos_end <= len(line):
-        yield line[pos_start:pos_end]
-        pos_start = pos_end + 1  # Adding extra "one" to skip a space between crate representations
-
-
 def parse_crates_layer(line: str) -> List[Optional[str]]:
-    """Convert a string line into a list with crate names or Nones"""
-    layer = []
-    for part in line_splitter(line):
-        match = CRATE_REGEX.match(part)
-        if match:
-            layer.append(match.group("crate_name"))
-        else:
-            layer.append(None)
-    return layer
+    """Convert a string line into a list with crate names or Nones
+
+    Crate names and opening brackets are taken with fixed-stride slices, instead of splitting the line into parts.
+    """
+    line = line.rstrip("\n")
+    return [name if bracket == "[" else None for bracket, name in zip(line[::CRATE_STRIDE], line[1::CRATE_STRIDE])]
 
 
 def make_stacks(crates_layers, num_of_stacks):
@@ -137,55 +150,268 @@ def make_stacks(crates_layers, num_of_stacks):
     return stacks
 
 
-def parse_move(line: str):
+class SparseStacks(dict):
+    """Stacks keyed with their indexes. A stack is created only when it's first used, so empty stacks cost nothing."""
+
+    def __missing__(self, stack_idx: int) -> Stack:
+        stack = self[stack_idx] = Stack()
+        return stack
+
+    def get_top(self) -> str:
+        """Get crates from the top of each stack, ordered by stack index. Empty stacks are skipped."""
+        return "".join(self[stack_idx].get_top() for stack_idx in sorted(self) if self[stack_idx].crates)
+
+
+def parse_sparse_drawing(lines: Iterable[str]) -> Tuple[Dict[int, List[str]], int]:
+    """Parse lines of the crates drawing into crates of non-empty stacks and number of stacks.
+
+    Crates of every stack are ordered from the bottom to the top. Only opening brackets are visited (found with
+    ``str.find``), so Python-level work scales with the number of crates. ``str.find`` and ``rstrip`` still scan every
+    character of a line in C, so that part of the cost remains linear in the width of the drawing.
+    """
+    stacks_crates: Dict[int, List[str]] = {}
+    num_of_stacks = 0
+    for line in lines:
+        line = line.rstrip("\n")
+        num_of_stacks = max(num_of_stacks, (len(line) + CRATE_STRIDE - 2) // CRATE_STRIDE)
+        pos = line.find("[")
+        while pos != -1:
+            stacks_crates.setdefault(pos // CRATE_STRIDE, []).append(line[pos + 1])
+            pos = line.find("[", pos + CRATE_STRIDE)
+    for crates in stacks_crates.values():
+        crates.reverse()  # drawing goes from the top to the bottom
+    return stacks_crates, num_of_stacks
+
+
+def make_sparse_stacks(stacks_crates: Dict[int, List[str]]) -> SparseStacks:
+    """Create stacks only for stacks that hold crates (see ``parse_sparse_drawing``)."""
+    stacks = SparseStacks()
+    for stack_idx, crates in stacks_crates.items():
+        stacks[stack_idx].put_many(crates)
+    return stacks
+
+
+def parse_move(line: str) -> Optional[Move]:
     """Parse "move" line to get number of crates to move, an index of source stack and an index of destination stack."""
-    match = MOVE_REGEX.match(line)
-    if match:
-        # Subtracting one from stack index because input has indexes starting at 1, but in the script we count from 0
-        return (
-            int(match.group("crates_number")),
-            int(match.group("source_stack")) - 1,
-            int(match.group("dest_stack")) - 1,
-        )
-    return None
+    words = line.split()
+    if len(words) != MOVE_WORDS_NUMBER or words[0] != "move":
+        return None
+    # Subtracting one from stack index because input has indexes starting at 1, but in the script we count from 0
+    return int(words[1]), int(words[3]) - 1, int(words[5]) - 1
+
+
+def parse_moves(data: AnyStr) -> List[Move]:
+    """Parse the whole list of moves (text or raw bytes) at once.
+
+    Data is split on whitespace only once and numbers are picked with slices, because every move has the same words.
+    """
+    words = data.split()
+    if len(words) % MOVE_WORDS_NUMBER:
+        raise ValueError("Invalid list of moves")
+    crates_numbers = [int(word) for word in words[1::MOVE_WORDS_NUMBER]]
+    source_stacks = [int(word) - 1 for word in words[3::MOVE_WORDS_NUMBER]]
+    dest_stacks = [int(word) - 1 for word in words[5::MOVE_WORDS_NUMBER]]
+    return list(zip(crates_numbers, source_stacks, dest_stacks))
+
+
+def iter_move_log(path: str) -> Iterator[Move]:
+    """Read moves from a binary move log, unpacking fixed-width records straight from the memory-mapped file."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if mapped[: len(MOVE_LOG_MAGIC)] != MOVE_LOG_MAGIC or (len(mapped) - len(MOVE_LOG_MAGIC)) % MOVE_RECORD.size:
+            raise ValueError(f"Invalid move log '{path}'")
+        records = memoryview(mapped)[len(MOVE_LOG_MAGIC) :]
+        moves = MOVE_RECORD.iter_unpack(records)
+        try:
+            yield from moves
+        finally:
+            del moves  # memory map can't be closed while the records are still in use
+            records.release()
+
+
+def parse_input(data: AnyStr) -> Tuple[List[List[Optional[str]]], int, List[Move]]:
+    """Parse the whole puzzle input (text or raw bytes) into crates layers, number of stacks and list of moves."""
+    drawing, _, moves_data = data.partition(b"\n\n" if isinstance(data, bytes) else "\n\n")
+    if isinstance(drawing, bytes):
+        drawing = drawing.decode()  # drawing is tiny compared to the list of moves
+    return (*parse_drawing(drawing.split("\n")), parse_moves(moves_data))
+
+
+def parse_drawing(lines: Iterable[str]) -> Tuple[List[List[Optional[str]]], int]:
+    """Parse lines of the crates drawing into crates layers and number of stacks."""
+    crates_layers = []
+    num_of_stacks = 0
+    for line in lines:
+        layer = parse_crates_layer(line)
+        if len(layer) > num_of_stacks:
+            num_of_stacks = len(layer)
+        if any(layer):  # Skip "empty" layers
+            crates_layers.append(layer)
+    return crates_layers, num_of_stacks
 
 
 def make_move(stacks, move):
     """Move crates between stacks"""
     crates_number, source_stack_idx, dest_stack_idx = move
+    if source_stack_idx == dest_stack_idx:
+        return  # every crate would be put back where it was taken from
     source_stack = stacks[source_stack_idx]
     dest_stack = stacks[dest_stack_idx]
-    for _ in range(crates_number):
-        crate = source_stack.remove()
-        assert crate is not None
-        dest_stack.put(crate)
-
+    # CrateMover 9000 moves crates one at a time, which is the same as moving all of them at once in reversed order
+    crates_to_move = source_stack.remove_many(n=crates_number)
+    assert len(crates_to_move) == crates_number
+    crates_to_move.reverse()
+    dest_stack.put_many(crates_to_move)
+
+
+def combine_moves(first: Move, second: Move) -> Optional[List[Move]]:
+    """Replace two consecutive moves with an equivalent list of at most one move (or None if it's not possible).
+
+    CrateMover 9000 moves crates one at a time, so moves are just sequences of single-crate moves:
+    - moves between the same pair of stacks add up,
+    - moves in opposite directions cancel out crate by crate,
+    - a single crate moved from A to B and then from B to C is moved from A to C.
+    """
+    first_number, first_source, first_dest = first
+    second_number, second_source, second_dest = second
+    if (first_source, first_dest) == (second_source, second_dest):
+        return [(first_number + second_number, first_source, first_dest)]
+    if (first_source, first_dest) == (second_dest, second_source):
+        if first_number > second_number:
+            return [(first_number - second_number, first_source, first_dest)]
+        if first_number < second_number:
+            return [(second_number - first_number, second_source, second_dest)]
+        return []
+    if first_number == second_number == 1 and first_dest == second_source:
+        return [(1, first_source, second_dest)]
+    return None
 
-def main():
-    crates_layers = []
-    num_of_stacks = 0
-    parse_mode = ["stack", "moves"][0]
-    stacks = []
 
-    with open("input.txt", "r") as f:
-        for line in f.readlines():
-            if line != "\n":
-                if parse_mode == "stack":
-                    layer = parse_crates_layer(line)
-                    if len(layer) > num_of_stacks:
-                        num_of_stacks = len(layer)
-                    if any(layer):  # Skip "empty" layers
-                        crates_layers.append(layer)
-                else:
-                    move = parse_move(line)
-                    if move:
-                        make_move(stacks, move)
+def compact_moves(moves: List[Move]) -> Tuple[List[Move], CompactionStats]:
+    """Turn the list of moves into an equivalent, shorter plan.
+
+    Every move is combined with the last move of the plan for as long as ``combine_moves`` allows it, so whole
+    sequences of moves can cancel out or fuse together. Note that moves which would fail because of missing crates
+    may disappear from the plan as well.
+    """
+    plan: List[Move] = []
+    for move in moves:
+        current: Optional[Move] = move
+        while current is not None:
+            crates_number, source_stack_idx, dest_stack_idx = current
+            if crates_number == 0 or source_stack_idx == dest_stack_idx:
+                current = None  # move doesn't change anything
+            elif plan and (combined := combine_moves(plan[-1], current)) is not None:
+                plan.pop()
+                current = combined[0] if combined else None
             else:
-                stacks = make_stacks(crates_layers, num_of_stacks)
-                parse_mode = "moves"  # Change parse mode
+                plan.append(current)
+                current = None
+
+    stats = CompactionStats(
+        moves_before=len(moves),
+        moves_after=len(plan),
+        crates_moved_before=sum(move[0] for move in moves),
+        crates_moved_after=sum(move[0] for move in plan),
+    )
+    return plan, stats
+
+
+def trace_top_crates(moves: List[Move], num_of_stacks: int) -> List[Tuple[int, int]]:
+    """Find where crates that end up on top of each stack were located before the rearrangement procedure.
+
+    Moves are walked backwards once and only the positions (stack index, depth counted from the top) of the final top
+    crates are tracked, so none of the crates have to be moved. Tracked crates are grouped by the stack they are in,
+    so a move only updates the ones in its source and destination stacks. Returns the initial position for every stack.
+    """
+    depths = [0] * num_of_stacks  # final stack index -> depth of its top crate in the stack the crate is in
+    tracked = [[final_stack_idx] for final_stack_idx in range(num_of_stacks)]  # stack index -> tracked crates in it
+    for crates_number, source_stack_idx, dest_stack_idx in reversed(moves):
+        if source_stack_idx == dest_stack_idx:
+            continue  # crates are put back where they were taken from
+        in_source, in_dest = tracked[source_stack_idx], tracked[dest_stack_idx]
+        for final_stack_idx in in_source:
+            depths[final_stack_idx] += crates_number
+        if in_dest:
+            # Crates that were among the moved ones were in the source stack before the move
+            moved = [final_stack_idx for final_stack_idx in in_dest if depths[final_stack_idx] < crates_number]
+            if moved:
+                in_dest = [final_stack_idx for final_stack_idx in in_dest if depths[final_stack_idx] >= crates_number]
+                tracked[dest_stack_idx] = in_dest
+                # CrateMover 9000 moved crates one at a time, so their order was reversed
+                for final_stack_idx in moved:
+                    depths[final_stack_idx] = crates_number - 1 - depths[final_stack_idx]
+                in_source.extend(moved)
+            for final_stack_idx in in_dest:
+                depths[final_stack_idx] -= crates_number
+
+    positions = [(0, 0)] * num_of_stacks
+    for stack_idx, final_stack_idxs in enumerate(tracked):
+        for final_stack_idx in final_stack_idxs:
+            positions[final_stack_idx] = (stack_idx, depths[final_stack_idx])
+    return positions
+
+
+def find_top_crates(
+    crates_layers: List[List[Optional[str]]], num_of_stacks: int, moves: List[Move]
+) -> str:
+    """Find crates that end up on top of each stack without simulating the moves (see ``trace_top_crates``).
+
+    Stacks that end up empty are skipped.
+    """
+    top_crates = []
+    for stack_idx, depth in trace_top_crates(moves, num_of_stacks):
+        # Crates layers are ordered from the top to the bottom
+        stack_crates = [layer[stack_idx] for layer in crates_layers if stack_idx < len(layer) and layer[stack_idx]]
+        if depth < len(stack_crates):
+            top_crates.append(stack_crates[depth])
+    return "".join(top_crates)
+
+
+def main(lazy: bool = False, compact: bool = False, move_log: Optional[str] = None, sparse: bool = False):
+    """Solve the puzzle by simulating all moves or, in ``lazy`` mode, by tracing only crates ending up on top.
+
+    With ``compact``, the list of moves is shortened by ``compact_moves`` before it's used. With ``move_log``, moves
+    are replayed from the binary move log and only the crates drawing is read from the input. With ``sparse``, only
+    stacks holding crates or touched by moves are created, which suits very wide drawings.
+    """
+    if lazy and sparse:
+        raise ValueError("Lazy mode needs all stacks, so it can't be combined with sparse stacks")
+
+    moves: Iterable[Move]
+    with open("input.txt", "r") as f:
+        if move_log is None:
+            drawing, _, moves_data = f.read().partition("\n\n")
+            drawing_lines: Iterable[str] = drawing.split("\n")
+            moves = parse_moves(moves_data)
+        else:
+            drawing_lines = takewhile(lambda line: line != "\n", f)
+            moves = iter_move_log(move_log)
+        if sparse:
+            stacks_crates, num_of_stacks = parse_sparse_drawing(drawing_lines)
+        else:
+            crates_layers, num_of_stacks = parse_drawing(drawing_lines)
+
+    if compact:
+        moves, stats = compact_moves(list(moves))
+        print(
+            f"Compacted moves: {stats.moves_before} -> {stats.moves_after}, "
+            f"crates moved: {stats.crates_moved_before} -> {stats.crates_moved_after}"
+        )
+
+    if lazy:
+        result = find_top_crates(crates_layers, num_of_stacks, list(moves))
+    elif sparse:
+        sparse_stacks = make_sparse_stacks(stacks_crates)
+        for move in moves:
+            make_move(sparse_stacks, move)
+        result = sparse_stacks.get_top()
+    else:
+        stacks = make_stacks(crates_layers, num_of_stacks)
+        for move in moves:
+            make_move(stacks, move)
         result = "".join(stack.get_top() for stack in stacks)
-        print("Result:", result)
-        return result
+    print("Result:", result)
+    return result
 
 
 if __name__ == "__main__":
@@ -0,0 +1,70 @@
+"""
+Compact binary move log, so long rearrangement procedures don't have to be parsed from text on every run.
+
+Move log is ``MOVE_LOG_MAGIC`` followed by one fixed-width record per move (little-endian uint32 fields)::
+
+    count        number of moved crates
+    source       index of the source stack (0-based)
+    destination  index of the destination stack (0-based)
+
+Records can be unpacked with ``struct.iter_unpack`` (see ``iter_move_log``) or viewed as a NumPy array without any
+copying (see ``load_move_log_array``).
+
+Usage (converts moves from the text input to a move log)::
+
+    python -m day5.move_log [INPUT_PATH] [MOVE_LOG_PATH]
+"""
+import os
+import sys
+from typing import Iterable, Union
+
+from .main_part_1 import MOVE_LOG_MAGIC, MOVE_RECORD, Move, parse_input
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, it's used only by ``load_move_log_array``
+    np = None
+
+PathType = Union[str, os.PathLike]
+
+
+def write_move_log(moves: Iterable[Move], path: PathType) -> int:
+    """Write moves to a binary move log file. Return number of written moves."""
+    n_moves = 0
+    with open(path, "wb") as f:
+        f.write(MOVE_LOG_MAGIC)
+        for move in moves:
+            f.write(MOVE_RECORD.pack(*move))
+            n_moves += 1
+    return n_moves
+
+
+def convert_text_to_move_log(text_path: PathType, log_path: PathType) -> int:
+    """Convert moves from the text puzzle input to a binary move log. Return number of converted moves."""
+    with open(text_path, "rb") as f:
+        _, _, moves = parse_input(f.read())
+    return write_move_log(moves, log_path)
+
+
+def load_move_log_array(path: PathType) -> "np.ndarray":
+    """Map a binary move log as a NumPy structured array with ``count``, ``source`` and ``dest`` fields."""
+    if np is None:
+        raise RuntimeError("NumPy is required to load the move log as an array")
+    with open(path, "rb") as f:
+        magic = f.read(len(MOVE_LOG_MAGIC))
+    if magic != MOVE_LOG_MAGIC or (os.path.getsize(path) - len(MOVE_LOG_MAGIC)) % MOVE_RECORD.size:
+        raise ValueError(f"Invalid move log '{path}'")
+    dtype = np.dtype([("count", "<u4"), ("source", "<u4"), ("dest", "<u4")])
+    if os.path.getsize(path) == len(MOVE_LOG_MAGIC):
+        return np.empty(0, dtype=dtype)  # empty files can't be memory-mapped
+    return np.memmap(path, dtype=dtype, mode="r", offset=len(MOVE_LOG_MAGIC))
+
+
+def main() -> None:
+    text_path = sys.argv[1] if len(sys.argv) > 1 else "input.txt"
+    log_path = sys.argv[2] if len(sys.argv) > 2 else "moves.bin"
+    print(f"Converted {convert_text_to_move_log(text_path, log_path)} moves to '{log_path}'")
+
+
+if __name__ == "__main__":
+    main()
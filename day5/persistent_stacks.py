@@ -0,0 +1,143 @@
+"""
+Persistent (immutable) crate stacks for running many rearrangement procedures against one starting layout.
+
+Every stack is a linked list of ``(crate, node below)`` tuples. A move creates new nodes only for the moved crates and
+all other crates are shared between the old and the new state, so any state of the procedure can be kept as a cheap
+snapshot, forked and used again without deep copies of the stacks.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .main_part_1 import Move
+
+Node = Tuple[str, Optional["Node"]]  # (crate, node below it)
+
+
+class PersistentStacks:
+    """Immutable state of all stacks. Moves return a new state and leave this one untouched."""
+
+    __slots__ = ("tops", "heights")
+
+    def __init__(self, tops: Tuple[Optional[Node], ...], heights: Tuple[int, ...]) -> None:
+        self.tops = tops
+        self.heights = heights
+
+    @classmethod
+    def from_lists(cls, stacks: Sequence[Sequence[str]]) -> "PersistentStacks":
+        """Create the state from lists of crates (ordered from the bottom to the top of each stack)."""
+        tops = []
+        for crates in stacks:
+            node: Optional[Node] = None
+            for crate in crates:
+                node = (crate, node)
+            tops.append(node)
+        return cls(tuple(tops), tuple(len(crates) for crates in stacks))
+
+    @classmethod
+    def from_crates_layers(cls, crates_layers: List[List[Optional[str]]], num_of_stacks: int) -> "PersistentStacks":
+        """Create the state from parsed crates layers (see ``parse_input``)."""
+        stacks: List[List[str]] = [[] for _ in range(num_of_stacks)]
+        for layer in reversed(crates_layers):  # insert from bottom to the top
+            for stack_idx, crate in enumerate(layer):
+                if crate:
+                    stacks[stack_idx].append(crate)
+        return cls.from_lists(stacks)
+
+    def to_lists(self) -> List[List[str]]:
+        """Get lists of crates (ordered from the bottom to the top of each stack)."""
+        stacks = []
+        for node in self.tops:
+            crates = []
+            while node is not None:
+                crates.append(node[0])
+                node = node[1]
+            crates.reverse()
+            stacks.append(crates)
+        return stacks
+
+    def get_top(self) -> str:
+        """Get crates from the top of each stack. Empty stacks are skipped."""
+        return "".join(node[0] for node in self.tops if node is not None)
+
+    def make_move(self, move: Move, keep_order: bool) -> "PersistentStacks":
+        """Return the state after the move. ``keep_order`` is False for CrateMover 9000 and True for CrateMover 9001.
+
+        Costs O(k) for k moved crates (plus copying the tuple of stack tops).
+        """
+        crates_number, source_stack_idx, dest_stack_idx = move
+        if crates_number == 0 or source_stack_idx == dest_stack_idx:
+            return self
+        if self.heights[source_stack_idx] < crates_number:
+            raise ValueError(f"Cannot move {crates_number} crates from stack {source_stack_idx + 1}")
+
+        moved_crates = []  # from the top to the bottom of the source stack
+        source_node = self.tops[source_stack_idx]
+        for _ in range(crates_number):
+            crate, source_node = source_node
+            moved_crates.append(crate)
+
+        # CrateMover 9000 puts the top crate first, CrateMover 9001 puts all crates at once, keeping their order
+        dest_node = self.tops[dest_stack_idx]
+        for crate in reversed(moved_crates) if keep_order else moved_crates:
+            dest_node = (crate, dest_node)
+
+        tops = list(self.tops)
+        heights = list(self.heights)
+        tops[source_stack_idx], tops[dest_stack_idx] = source_node, dest_node
+        heights[source_stack_idx] -= crates_number
+        heights[dest_stack_idx] += crates_number
+        return PersistentStacks(tuple(tops), tuple(heights))
+
+
+def run_procedure(
+    stacks: PersistentStacks, moves: Sequence[Move], keep_order: bool, checkpoint_interval: Optional[int] = None
+) -> Tuple[PersistentStacks, Dict[int, PersistentStacks]]:
+    """Apply all moves and return the final state with checkpoints.
+
+    Checkpoints are keyed with the number of moves applied so far. The initial state is always a checkpoint and, with
+    ``checkpoint_interval``, every ``checkpoint_interval``-th state is one too. States share their crates, so keeping
+    them is cheap.
+    """
+    checkpoints = {0: stacks}
+    for moves_applied, move in enumerate(moves, start=1):
+        stacks = stacks.make_move(move, keep_order)
+        if checkpoint_interval and moves_applied % checkpoint_interval == 0:
+            checkpoints[moves_applied] = stacks
+    return stacks, checkpoints
+
+
+def get_state_at(
+    checkpoints: Dict[int, PersistentStacks], moves: Sequence[Move], moves_applied: int, keep_order: bool
+) -> PersistentStacks:
+    """Get the state after ``moves_applied`` moves, replaying only moves after the nearest earlier checkpoint."""
+    checkpoint = max(index for index in checkpoints if index <= moves_applied)
+    stacks = checkpoints[checkpoint]
+    for move in moves[checkpoint:moves_applied]:
+        stacks = stacks.make_move(move, keep_order)
+    return stacks
+
+
+_worker_stacks: Optional[PersistentStacks] = None  # starting layout of a worker process
+
+
+def _init_worker(stacks: List[List[str]]) -> None:
+    global _worker_stacks
+    _worker_stacks = PersistentStacks.from_lists(stacks)
+
+
+def _run_in_worker(moves: Sequence[Move], keep_order: bool) -> str:
+    if _worker_stacks is None:
+        raise RuntimeError("Worker was not initialized")
+    return run_procedure(_worker_stacks, moves, keep_order)[0].get_top()
+
+
+def run_procedures_parallel(
+    stacks: PersistentStacks, procedures: Sequence[Sequence[Move]], keep_order: bool, max_workers: Optional[int] = None
+) -> List[str]:
+    """Run many procedures against the same starting layout in a process pool and return the top crates of each.
+
+    Starting layout is sent to every worker process only once, when the worker starts.
+    """
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(stacks.to_lists(),)) as executor:
+        return list(executor.map(_run_in_worker, procedures, repeat(keep_order)))
@@ -1,7 +1,24 @@
+import random
+import struct
 from unittest.mock import mock_open, patch
 
+import pytest
+
+from .main_part_1 import Stack as Stack_1
+from .main_part_1 import compact_moves as compact_moves_1
+from .main_part_1 import find_top_crates as find_top_crates_1
 from .main_part_1 import main as main_1
+from .main_part_1 import make_move as make_move_1
+from .main_part_1 import iter_move_log, make_sparse_stacks, parse_input, parse_sparse_drawing
+from .main_part_1 import trace_top_crates as trace_top_crates_1
+from .main_part_2 import Stack as Stack_2
+from .main_part_2 import compact_moves as compact_moves_2
+from .main_part_2 import find_top_crates as find_top_crates_2
 from .main_part_2 import main as main_2
+from .main_part_2 import make_move as make_move_2
+from .main_part_2 import trace_top_crates as trace_top_crates_2
+from .move_log import convert_text_to_move_log, load_move_log_array
+from .persistent_stacks import PersistentStacks, get_state_at, run_procedure, run_procedures_parallel
 
 TEST_INPUT = """
     [D]    
@@ -34,3 +51,173 @@ def test_part_2(mock_file):
 
     mock_file.assert_called_with("input.txt", "r")
     assert result == ANSWER_PART_2
+
+
+def test_bulk_moves_on_tall_stacks():
+    stacks_1, stacks_2 = [Stack_1(), Stack_1()], [Stack_2(), Stack_2()]
+    for stacks in (stacks_1, stacks_2):
+        for i in range(100000):
+            stacks[0].put(str(i))
+
+    make_move_1(stacks_1, (3, 0, 1))
+    make_move_2(stacks_2, (3, 0, 1))
+
+    assert stacks_1[1].crates == ["99999", "99998", "99997"]
+    assert stacks_2[1].crates == ["99997", "99998", "99999"]
+    assert len(stacks_1[0].crates) == len(stacks_2[0].crates) == 99997
+    assert stacks_1[0].remove_many(0) == []
+
+
+def test_move_onto_the_same_stack_changes_nothing():
+    for stack_class, make_move in [(Stack_1, make_move_1), (Stack_2, make_move_2)]:
+        stacks = [stack_class()]
+        stacks[0].put_many(["A", "B", "C"])
+        make_move(stacks, (2, 0, 0))
+        assert stacks[0].crates == ["A", "B", "C"]
+
+
+@patch("builtins.open", new_callable=mock_open, read_data=TEST_INPUT)
+def test_part_1_lazy(mock_file):
+    assert main_1(lazy=True) == ANSWER_PART_1
+
+
+@patch("builtins.open", new_callable=mock_open, read_data=TEST_INPUT)
+def test_part_2_lazy(mock_file):
+    assert main_2(lazy=True) == ANSWER_PART_2
+
+
+def test_trace_top_crates():
+    moves = [(1, 1, 0), (3, 0, 2), (2, 1, 0), (1, 0, 1)]  # moves of the example, stacks are indexed from 0
+
+    assert trace_top_crates_1(moves, 3) == [(1, 1), (1, 2), (0, 1)]  # C, M and Z
+    assert trace_top_crates_2(moves, 3) == [(1, 2), (1, 1), (1, 0)]  # M, C and D
+    for trace_top_crates in (trace_top_crates_1, trace_top_crates_2):
+        assert trace_top_crates([(2, 0, 0)], 1) == [(0, 0)]
+
+
+def test_parse_input_from_bytes():
+    crates_layers, num_of_stacks, moves = parse_input(TEST_INPUT.encode())
+
+    assert parse_input(TEST_INPUT) == (crates_layers, num_of_stacks, moves)
+    assert crates_layers == [[None, "D", None], ["N", "C", None], ["Z", "M", "P"]]
+    assert num_of_stacks == 3
+    assert moves == [(1, 1, 0), (3, 0, 2), (2, 1, 0), (1, 0, 1)]
+
+
+def generate_moves(n_moves, heights, rng):
+    """Generate random, valid moves (never taking more crates than a stack has)."""
+    heights = list(heights)
+    moves = []
+    for _ in range(n_moves):
+        source = rng.choice([i for i, height in enumerate(heights) if height])
+        dest = rng.randrange(len(heights))
+        if moves and rng.random() < 0.5:  # make cancelling and chained moves frequent
+            crates_number, _, previous_dest = moves[-1]
+            source, dest = previous_dest, rng.choice([moves[-1][1], dest])
+            crates_number = min(crates_number, heights[source])
+        else:
+            crates_number = rng.randint(1, heights[source])
+        heights[source] -= crates_number
+        heights[dest] += crates_number
+        moves.append((crates_number, source, dest))
+    return moves
+
+
+def test_compacted_and_lazy_moves_give_the_same_stacks():
+    rng = random.Random(5)
+    for stack_class, make_move, compact_moves, find_top_crates in [
+        (Stack_1, make_move_1, compact_moves_1, find_top_crates_1),
+        (Stack_2, make_move_2, compact_moves_2, find_top_crates_2),
+    ]:
+        for _ in range(50):
+            layout = [[f"{i}-{j}" for j in range(rng.randint(1, 6))] for i in range(4)]
+            moves = generate_moves(30, [len(crates) for crates in layout], rng)
+            plan, stats = compact_moves(moves)
+
+            results = []
+            for moves_to_make in (moves, plan):
+                stacks = [stack_class() for _ in layout]
+                for stack, crates in zip(stacks, layout):
+                    stack.put_many(crates)
+                for move in moves_to_make:
+                    make_move(stacks, move)
+                results.append([stack.crates for stack in stacks])
+
+            assert results[0] == results[1]
+            crates_layers = [[crates[-i] if i <= len(crates) else None for crates in layout] for i in range(1, 7)]
+            expected_top = "".join(crates[-1] for crates in results[0] if crates)
+            assert find_top_crates(crates_layers, len(layout), moves) == expected_top
+            assert find_top_crates(crates_layers, len(layout), plan) == expected_top
+            assert stats.moves_after == len(plan) <= stats.moves_before == len(moves)
+            assert stats.crates_moved_after <= stats.crates_moved_before
+
+
+def test_compact_moves_respects_crane_semantics():
+    moves = [(2, 0, 1), (3, 0, 1), (1, 1, 2), (1, 2, 0), (4, 1, 2), (4, 2, 0)]
+
+    assert compact_moves_1(moves)[0] == [(4, 0, 1), (4, 1, 2), (4, 2, 0)]
+    assert compact_moves_2(moves)[0] == [(2, 0, 1), (3, 0, 1), (1, 1, 0), (4, 1, 0)]
+
+
+def test_persistent_stacks_procedures():
+    crates_layers, num_of_stacks, moves = parse_input(TEST_INPUT)
+    initial = PersistentStacks.from_crates_layers(crates_layers, num_of_stacks)
+
+    final_1, checkpoints = run_procedure(initial, moves, keep_order=False, checkpoint_interval=2)
+    final_2, _ = run_procedure(initial, moves, keep_order=True)
+
+    assert final_1.get_top() == ANSWER_PART_1
+    assert final_2.get_top() == ANSWER_PART_2
+    assert initial.to_lists() == [["Z", "N"], ["M", "C", "D"], ["P"]]  # initial state is not modified
+    assert sorted(checkpoints) == [0, 2, 4]
+    assert get_state_at(checkpoints, moves, 3, keep_order=False).to_lists() == [["C", "M"], [], ["P", "D", "N", "Z"]]
+
+    # Fork the procedure after the first move
+    after_first_move = get_state_at(checkpoints, moves, 1, keep_order=False)
+    assert after_first_move.make_move((1, 2, 1), keep_order=False).get_top() == "DP"
+    assert after_first_move.to_lists() == [["Z", "N", "D"], ["M", "C"], ["P"]]
+    assert run_procedures_parallel(initial, [moves, moves[:1]], keep_order=True, max_workers=2) == ["MCD", "DCP"]
+
+
+@patch("builtins.open", new_callable=mock_open, read_data=TEST_INPUT)
+def test_sparse_stacks(mock_file):
+    assert main_1(sparse=True) == ANSWER_PART_1
+    assert main_2(sparse=True) == ANSWER_PART_2
+    mock_file.assert_called_with("input.txt", "r")
+
+    # Very wide drawing with only a few crates
+    drawing = [" " * 4 * 99999 + "[A]", "[B] " + " " * 4 * 99999 + "[C]"]
+    stacks_crates, num_of_stacks = parse_sparse_drawing(drawing)
+    assert stacks_crates == {0: ["B"], 99999: ["A"], 100000: ["C"]}
+    assert num_of_stacks == 100001
+
+    stacks = make_sparse_stacks(stacks_crates)
+    make_move_2(stacks, (1, 99999, 500000))
+    assert len(stacks) == 4  # only stacks with crates and stacks touched by moves exist
+    assert stacks.get_top() == "BCA"
+
+
+def test_move_log_replay(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "input.txt").write_text(TEST_INPUT)
+    assert convert_text_to_move_log("input.txt", "moves.bin") == 4
+
+    assert list(iter_move_log("moves.bin")) == parse_input(TEST_INPUT)[2]
+    assert main_1(move_log="moves.bin") == main_1(lazy=True, move_log="moves.bin") == ANSWER_PART_1
+    assert main_2(move_log="moves.bin") == main_2(compact=True, move_log="moves.bin") == ANSWER_PART_2
+
+    (tmp_path / "broken.bin").write_bytes(b"AOC5MOVE" + struct.pack("<II", 1, 2))
+    with pytest.raises(ValueError):
+        list(iter_move_log("broken.bin"))
+
+
+def test_move_log_array(tmp_path):
+    pytest.importorskip("numpy")
+    input_path = tmp_path / "input.txt"
+    input_path.write_text(TEST_INPUT)
+    convert_text_to_move_log(input_path, tmp_path / "moves.bin")
+
+    moves = load_move_log_array(tmp_path / "moves.bin")
+    assert moves["count"].tolist() == [1, 3, 2, 1]
+    assert moves["source"].tolist() == [1, 0, 1, 0]
+    assert moves["dest"].tolist() == [0, 2, 0, 1]
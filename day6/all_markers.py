@@ -0,0 +1,144 @@
+"""
+Bulk search of every marker occurrence in a datastream, vectorized with NumPy.
+
+A marker of length ``L`` ends after byte ``i`` when the last ``L`` bytes are all different. Chunks of the datastream
+are scanned with one of two engines:
+
+- Parity masks (used when bytes of the chunk span at most ``MAX_PARITY_LANES`` lanes of 64 byte values, e.g. for text).
+  Every byte value is one bit of a 64-bit mask of its lane. XOR of the masks of a window keeps bits of the values
+  occurring an odd number of times, so the window is a marker exactly when its XORs have ``L`` bits set in total. XOR
+  of a window is a XOR of two prefix XORs (``np.bitwise_xor.accumulate``), so a lane costs a few passes over the chunk.
+- Previous occurrences (used for other chunks). A stable sort of the chunk by byte value gives the previous occurrence
+  of every byte (it's the element before it in sorted order) and the start of the run of distinct bytes ending at every
+  position is a running maximum (``np.maximum.accumulate``) of those.
+
+Only the last ``L - 1`` bytes are carried over between chunks (and prepended to the next one), so markers crossing
+chunk boundaries are found and memory stays bounded by the chunk size however long the stream is. On random lowercase
+text, the parity engine processes about 100 MB/s on a slow single core (about 30 MB/s for the sorting engine).
+
+Usage (prints the number of markers and the first few positions)::
+
+    python -m day6.all_markers PATH [MARKER_LENGTH]
+"""
+import mmap
+import sys
+import time
+from functools import partial
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from .main_part_1 import MARKER_LENGTH
+
+# How many bytes of the datastream are processed at once, small enough for the working arrays to stay in cache
+CHUNK_SIZE = 1 << 16
+# Byte values are split into lanes of this many values, one bit of an uint64 mask per value
+LANE_SIZE = 64
+# Chunks spanning more lanes are scanned by sorting, which is faster then (must be at most 3, see bit counts)
+MAX_PARITY_LANES = 2
+# Bytes can take only this many values, so longer markers never occur
+MAX_MARKER_LENGTH = 256
+
+
+def _find_marker_ends_by_parity(data: "np.ndarray", lanes: range, marker_length: int) -> "np.ndarray":
+    """Return ends (numbers of bytes processed) of all markers within ``data``, using parity masks of byte values."""
+    size = data.size
+    if size < marker_length:
+        return np.empty(0, dtype=np.int64)
+    masks = np.left_shift(np.uint64(1), data & (LANE_SIZE - 1), dtype=np.uint64)
+    data_lanes = data >> LANE_SIZE.bit_length() - 1 if len(lanes) > 1 else None
+    prefix_xors = np.zeros(size + 1, dtype=np.uint64)
+    bit_counts = np.zeros(size + 1 - marker_length, dtype=np.uint8)  # at most 64 bits per lane, so no overflow
+    for lane in lanes:
+        lane_masks = masks if data_lanes is None else np.where(data_lanes == lane, masks, np.uint64(0))
+        np.bitwise_xor.accumulate(lane_masks, out=prefix_xors[1:])
+        bit_counts += np.bitwise_count(prefix_xors[marker_length:] ^ prefix_xors[:-marker_length])
+    return np.flatnonzero(bit_counts == marker_length) + marker_length
+
+
+def _find_marker_ends_by_sorting(data: "np.ndarray", marker_length: int) -> "np.ndarray":
+    """Return ends (numbers of bytes processed) of all markers within ``data``, using previous occurrences of bytes."""
+    size = data.size
+    order = np.argsort(data, kind="stable").astype(np.int32)  # radix sort for bytes
+    sorted_data = data[order]
+    first_occurrence = np.empty(size, dtype=bool)
+    first_occurrence[0] = True
+    np.not_equal(sorted_data[1:], sorted_data[:-1], out=first_occurrence[1:])
+
+    previous = np.empty(size, dtype=np.int32)
+    previous[order[1:]] = order[:-1]
+    previous[order[first_occurrence]] = -1
+    # Run ending at position i starts right after the latest previous occurrence of any byte up to i
+    starts = np.maximum.accumulate(previous, out=previous)
+    lengths = np.arange(size, dtype=np.int32)
+    lengths -= starts
+    return np.flatnonzero(lengths >= marker_length) + 1
+
+
+def iter_marker_positions(chunks: Iterable[bytes], marker_length: int = MARKER_LENGTH) -> Iterator["np.ndarray"]:
+    """Yield, for every chunk of bytes, the positions (characters processed so far) where markers are complete.
+
+    Positions are absolute, i.e. counted from the beginning of the datastream, like the ones ``find_marker`` returns.
+    """
+    if marker_length < 1:
+        raise ValueError("Marker length must be positive")
+    tail = b""  # last bytes of the previous chunks, prepended to the next one
+    processed = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        data = np.frombuffer(tail + bytes(chunk), dtype=np.uint8)
+        if marker_length > MAX_MARKER_LENGTH:
+            ends = np.empty(0, dtype=np.int64)
+        else:
+            lanes = range(int(data.min()) // LANE_SIZE, int(data.max()) // LANE_SIZE + 1)  # may include empty lanes
+            if len(lanes) <= MAX_PARITY_LANES and hasattr(np, "bitwise_count"):  # NumPy 2.0+
+                ends = _find_marker_ends_by_parity(data, lanes, marker_length)
+            else:
+                ends = _find_marker_ends_by_sorting(data, marker_length)
+            ends = ends[ends > len(tail)]  # markers ending within the tail were found in the previous chunk
+        yield ends + (processed - len(tail))
+
+        processed += len(chunk)
+        tail = data[max(data.size - marker_length + 1, 0) :].tobytes() if marker_length <= MAX_MARKER_LENGTH else b""
+
+
+def find_all_markers(data: bytes, marker_length: int = MARKER_LENGTH, chunk_size: int = CHUNK_SIZE) -> "np.ndarray":
+    """Find positions of all markers of a whole buffer."""
+    chunks = (data[start : start + chunk_size] for start in range(0, len(data), chunk_size))
+    return np.concatenate([np.empty(0, dtype=np.int64), *iter_marker_positions(chunks, marker_length)])
+
+
+def iter_marker_positions_in_file(
+    path: str, marker_length: int = MARKER_LENGTH, chunk_size: int = CHUNK_SIZE
+) -> Iterator["np.ndarray"]:
+    """Yield positions of all markers in a (possibly huge) datastream file, chunk by chunk, reading it through a
+    memory map."""
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files can't be memory-mapped
+            return
+        with mapped:
+            yield from iter_marker_positions(iter(partial(mapped.read, chunk_size), b""), marker_length)
+
+
+def main() -> None:
+    path = sys.argv[1]
+    marker_length = int(sys.argv[2]) if len(sys.argv) > 2 else MARKER_LENGTH
+
+    start = time.perf_counter()
+    count = 0
+    first_positions = []
+    for positions in iter_marker_positions_in_file(path, marker_length):
+        count += positions.size
+        if len(first_positions) < 10:
+            first_positions.extend(positions[: 10 - len(first_positions)].tolist())
+    elapsed = time.perf_counter() - start
+
+    print(f"Markers: {count} ({elapsed:.3f}s)")
+    print(f"First positions: {first_positions}")
+
+
+if __name__ == "__main__":
+    main()
@@ -46,31 +46,56 @@ How many characters need to be processed before the first start-of-packet marker
 
 https://adventofcode.com/2022/day/6
 """
-from collections import deque
+import mmap
+from functools import partial
+from typing import AnyStr, Iterable, Optional
 
 MARKER_LENGTH = 4
+# How many characters are read from the datastream at once
+BUFFER_SIZE = 1 << 20
 
 
-def main():
-    # Deque works as a fixed-size window moving through the stream, char by char
-    marker = deque([], maxlen=MARKER_LENGTH)
-    pos = 0
+def find_marker(chunks: Iterable[AnyStr], marker_length: int = MARKER_LENGTH) -> Optional[int]:
+    """Find the number of characters processed before the first marker is complete (or None if there's no marker).
 
-    with open("input.txt", "r") as f:
-        while 1:
-            char = f.read(1)
+    Datastream is given in chunks of text or bytes. The window moving through the stream is kept as the position where
+    it starts, and the last seen position of every character tells if the new character repeats one in the window.
+    That's constant work per character, no matter how long the marker is.
+    """
+    last_seen = {}
+    window_start = 0  # the window holds all characters from here to the current position, none of them repeated
+    pos = 0
+    for chunk in chunks:
+        for char in chunk:
+            previous_pos = last_seen.get(char, -1)
+            if previous_pos >= window_start:
+                window_start = previous_pos + 1  # drop characters up to the previous occurrence from the window
+            last_seen[char] = pos
             pos += 1
-            if not char:
-                break
-            marker.append(char)
+            if pos - window_start == marker_length:
+                return pos
+    return None
+
 
-            # SET keeps only unique items so if its length is equal to the length of a marker, then all items in it
-            # must be unique.
-            if len(set(marker)) == MARKER_LENGTH:
-                break
+def find_marker_in_file(path: str, marker_length: int = MARKER_LENGTH) -> Optional[int]:
+    """Find the marker in a (possibly huge) datastream file, reading it through a memory map in large buffers."""
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files can't be memory-mapped
+            return None
+        with mapped:
+            return find_marker(iter(partial(mapped.read, BUFFER_SIZE), b""), marker_length)
+
+
+def main():
+    with open("input.txt", "r") as f:
+        pos = find_marker(iter(partial(f.read, BUFFER_SIZE), ""))
 
-    print(f"Marker: {''.join(marker)}")
-    print(f"Position: {pos}")
+    if pos is None:
+        print("Marker not found")
+    else:
+        print(f"Position: {pos}")
     return pos
 
 
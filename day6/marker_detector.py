@@ -0,0 +1,86 @@
+"""
+Detection of markers of many lengths (e.g. start-of-packet and start-of-message) in a single pass over the datastream.
+
+All window lengths share the same state: the length of the longest run of distinct characters ending at the current
+position. The run grows by at most one character at a time, so a marker of length ``L`` is complete exactly when the
+run reaches ``L``. Supporting more window lengths costs only a comparison with the shortest one still pending.
+
+Usage (prints positions of both markers of the puzzle, reading the input only once)::
+
+    python -m day6.marker_detector [PATH]
+"""
+import sys
+from functools import partial
+from typing import AnyStr, Dict, Iterable, Optional, Union
+
+from .main_part_1 import BUFFER_SIZE
+from .main_part_1 import MARKER_LENGTH as START_OF_PACKET_LENGTH
+from .main_part_2 import MARKER_LENGTH as START_OF_MESSAGE_LENGTH
+
+
+class MarkerDetector:
+    """Incremental detector fed with consecutive chunks (text or bytes) of the datastream."""
+
+    def __init__(self, window_lengths: Iterable[int]) -> None:
+        self.pending = sorted(set(window_lengths), reverse=True)  # the shortest pending length is the last one
+        if not self.pending or self.pending[-1] < 1:
+            raise ValueError("Window lengths must be positive")
+        self.positions: Dict[int, int] = {}  # window length -> number of characters processed before the marker
+        self.pos = 0  # number of characters processed so far
+        self._last_seen: Dict[Union[str, int], int] = {}  # characters of text or byte values
+        self._window_start = 0
+
+    @property
+    def done(self) -> bool:
+        """True when markers of all window lengths have been found."""
+        return not self.pending
+
+    def feed(self, chunk: AnyStr) -> Dict[int, int]:
+        """Process the next chunk of the datastream. Return markers completed within this chunk.
+
+        Processing stops as soon as all markers are found, so the rest of the chunk is not consumed.
+        """
+        found = {}
+        last_seen, window_start, pos, pending = self._last_seen, self._window_start, self.pos, self.pending
+        if pending:
+            next_length = pending[-1]
+            for char in chunk:
+                previous_pos = last_seen.get(char, -1)
+                if previous_pos >= window_start:
+                    window_start = previous_pos + 1
+                last_seen[char] = pos
+                pos += 1
+                if pos - window_start == next_length:
+                    while pending and pending[-1] <= pos - window_start:
+                        found[pending.pop()] = pos
+                    if not pending:
+                        break
+                    next_length = pending[-1]
+        self._window_start, self.pos = window_start, pos
+        self.positions.update(found)
+        return found
+
+
+def find_markers(chunks: Iterable[AnyStr], window_lengths: Iterable[int]) -> Dict[int, Optional[int]]:
+    """Find the first marker of every window length (None if there's no such marker) in a single pass."""
+    window_lengths = list(window_lengths)
+    detector = MarkerDetector(window_lengths)
+    for chunk in chunks:
+        detector.feed(chunk)
+        if detector.done:
+            break
+    return {length: detector.positions.get(length) for length in window_lengths}
+
+
+def main() -> None:
+    path = sys.argv[1] if len(sys.argv) > 1 else "input.txt"
+    with open(path, "rb") as f:
+        positions = find_markers(
+            iter(partial(f.read, BUFFER_SIZE), b""), [START_OF_PACKET_LENGTH, START_OF_MESSAGE_LENGTH]
+        )
+    print(f"Start-of-packet marker: {positions[START_OF_PACKET_LENGTH]}")
+    print(f"Start-of-message marker: {positions[START_OF_MESSAGE_LENGTH]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Marker search over huge, memory-mapped datastreams, split into chunks scanned in a process pool.
+
+Every chunk owns markers that end within it. To find those, its scan starts ``marker_length - 1`` bytes before the
+chunk, so markers crossing the chunk boundary aren't missed, while no marker is ever owned by two chunks. The earliest
+chunk with a marker wins: once it's found, later chunks are cancelled (queued ones are never started and running ones
+stop at the next buffer), but earlier chunks are still awaited, so the result is the same as the sequential one.
+
+Usage (compares the parallel search with the sequential one)::
+
+    python -m day6.parallel_search PATH [MARKER_LENGTH]
+"""
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing import Value
+from typing import Any, Dict, Optional, Union
+
+from .main_part_1 import BUFFER_SIZE, MARKER_LENGTH, find_marker, find_marker_in_file
+
+# How many bytes of the datastream are owned by a single chunk
+CHUNK_SIZE = 64 << 20
+NOT_FOUND = sys.maxsize
+
+PathType = Union[str, os.PathLike]
+
+_found_chunk: Any = None  # index of the earliest chunk with a marker found so far, shared by all worker processes
+
+
+def _init_worker(found_chunk: Any) -> None:
+    global _found_chunk
+    _found_chunk = found_chunk
+
+
+def _scan_chunk(path: PathType, chunk_idx: int, chunk_size: int, marker_length: int) -> Optional[int]:
+    """Find the first marker ending within the chunk. None is returned if there's none or the scan was cancelled."""
+    start = chunk_idx * chunk_size
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        scan_start = max(start - marker_length + 1, 0)
+        scan_end = min(start + chunk_size, len(mapped))
+
+        def buffers():
+            for buffer_start in range(scan_start, scan_end, BUFFER_SIZE):
+                if _found_chunk is not None and _found_chunk.value < chunk_idx:
+                    return  # an earlier chunk has a marker, so this one doesn't matter anymore
+                yield mapped[buffer_start : min(buffer_start + BUFFER_SIZE, scan_end)]
+
+        pos = find_marker(buffers(), marker_length)
+
+    if pos is None:
+        return None
+    if _found_chunk is not None:
+        with _found_chunk.get_lock():
+            _found_chunk.value = min(_found_chunk.value, chunk_idx)
+    return scan_start + pos
+
+
+def find_marker_parallel(
+    path: PathType,
+    marker_length: int = MARKER_LENGTH,
+    chunk_size: int = CHUNK_SIZE,
+    max_workers: Optional[int] = None,
+) -> Optional[int]:
+    """Find the number of bytes processed before the first marker (or None), scanning chunks of the file in parallel.
+
+    At most twice as many chunks as workers are queued at the same time. Files that fit in a single chunk are scanned
+    sequentially in the calling process.
+    """
+    if chunk_size < marker_length:
+        raise ValueError("Chunk can't be shorter than the marker")
+    file_size = os.path.getsize(path)
+    n_chunks = -(-file_size // chunk_size)
+    if n_chunks <= 1:
+        return find_marker_in_file(os.fspath(path), marker_length)
+
+    found_chunk = Value("q", NOT_FOUND)
+    max_workers = max_workers or os.cpu_count() or 1
+    results: Dict[int, Optional[int]] = {}
+    pending: Dict[Future, int] = {}
+    next_chunk_idx = 0
+
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(found_chunk,)) as executor:
+        while True:
+            # Chunks before the earliest hit are the only ones that can still change the result
+            first_hit = min((idx for idx, pos in results.items() if pos is not None), default=n_chunks)
+            if all(idx in results for idx in range(first_hit)):
+                for future in pending:
+                    future.cancel()
+                return results.get(first_hit)
+
+            while next_chunk_idx < first_hit and len(pending) < 2 * max_workers:
+                future = executor.submit(_scan_chunk, path, next_chunk_idx, chunk_size, marker_length)
+                pending[future] = next_chunk_idx
+                next_chunk_idx += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+
+
+def main() -> None:
+    path = sys.argv[1]
+    marker_length = int(sys.argv[2]) if len(sys.argv) > 2 else MARKER_LENGTH
+
+    start = time.perf_counter()
+    sequential_pos = find_marker_in_file(path, marker_length)
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel_pos = find_marker_parallel(path, marker_length)
+    parallel_time = time.perf_counter() - start
+
+    print(f"Sequential: {sequential_pos} ({sequential_time:.3f}s)")
+    print(f"Parallel: {parallel_pos} ({parallel_time:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Marker detection on live datastreams received over sockets, with asyncio.
+
+Streams are read in large chunks and markers are reported as soon as the chunk completing them arrives. Backpressure
+comes from ``asyncio.StreamReader``: once its buffer holds more than ``limit`` bytes that haven't been read yet, the
+transport stops reading from the socket, so a slow consumer makes the sender wait (in ``drain``) instead of piling up
+data in memory. Every stream is a separate task, so many streams are handled concurrently in one event loop.
+
+A stand-in server sending a datastream to every client is included for tests and benchmarks::
+
+    python -m day6.stream_detector [PATH] [NUMBER_OF_STREAMS]
+"""
+import asyncio
+import sys
+import time
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from .main_part_1 import MARKER_LENGTH as START_OF_PACKET_LENGTH
+from .main_part_2 import MARKER_LENGTH as START_OF_MESSAGE_LENGTH
+from .marker_detector import MarkerDetector
+
+# How many bytes are read from the stream at once
+READ_SIZE = 1 << 16
+# Buffer limit of stream readers, the transport is paused when there's more unread data than that
+STREAM_LIMIT = 1 << 20
+
+
+async def iter_markers(
+    reader: asyncio.StreamReader, window_lengths: Iterable[int], read_size: int = READ_SIZE
+) -> AsyncIterator[Tuple[int, int]]:
+    """Yield ``(window length, position)`` of every marker as soon as it's found. Stop once all of them are found."""
+    detector = MarkerDetector(window_lengths)
+    while not detector.done:
+        chunk = await reader.read(read_size)
+        if not chunk:
+            return
+        for window_length, pos in sorted(detector.feed(chunk).items(), key=lambda item: item[1]):
+            yield window_length, pos
+
+
+async def detect_markers(
+    reader: asyncio.StreamReader, window_lengths: Iterable[int], read_size: int = READ_SIZE
+) -> Dict[int, Optional[int]]:
+    """Find the first marker of every window length in the stream (None if the stream ends without it)."""
+    window_lengths = list(window_lengths)
+    positions: Dict[int, Optional[int]] = dict.fromkeys(window_lengths)
+    async for window_length, pos in iter_markers(reader, window_lengths, read_size):
+        positions[window_length] = pos
+    return positions
+
+
+async def detect_markers_over_tcp(
+    host: str, port: int, window_lengths: Iterable[int], limit: int = STREAM_LIMIT
+) -> Dict[int, Optional[int]]:
+    """Connect to a datastream server and find its markers. Connection is closed as soon as all markers are found."""
+    reader, writer = await asyncio.open_connection(host, port, limit=limit)
+    try:
+        return await detect_markers(reader, window_lengths)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def detect_markers_over_unix_socket(
+    path: str, window_lengths: Iterable[int], limit: int = STREAM_LIMIT
+) -> Dict[int, Optional[int]]:
+    """Same as ``detect_markers_over_tcp``, but for a server listening on a UNIX socket."""
+    reader, writer = await asyncio.open_unix_connection(path, limit=limit)
+    try:
+        return await detect_markers(reader, window_lengths)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def _make_sender(data: bytes, chunk_size: int):
+    async def send_datastream(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            for start in range(0, len(data), chunk_size):
+                writer.write(data[start : start + chunk_size])
+                await writer.drain()  # waits while the client doesn't keep up
+        except ConnectionError:
+            pass  # client has found its markers and disconnected
+        finally:
+            writer.close()
+
+    return send_datastream
+
+
+async def start_datastream_server(
+    data: bytes, host: str = "127.0.0.1", port: int = 0, chunk_size: int = READ_SIZE
+) -> asyncio.AbstractServer:
+    """Start a TCP server sending ``data`` to every client (port 0 picks a free port, see ``server.sockets``)."""
+    return await asyncio.start_server(_make_sender(data, chunk_size), host, port)
+
+
+async def start_unix_datastream_server(
+    data: bytes, path: str, chunk_size: int = READ_SIZE
+) -> asyncio.AbstractServer:
+    """Start a UNIX socket server sending ``data`` to every client."""
+    return await asyncio.start_unix_server(_make_sender(data, chunk_size), path)
+
+
+async def run_benchmark(data: bytes, n_streams: int) -> None:
+    window_lengths = [START_OF_PACKET_LENGTH, START_OF_MESSAGE_LENGTH]
+    async with await start_datastream_server(data) as server:
+        host, port = server.sockets[0].getsockname()[:2]
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(detect_markers_over_tcp(host, port, window_lengths) for _ in range(n_streams))
+        )
+        elapsed = time.perf_counter() - start
+    print(f"Markers: {results[0]}")
+    print(f"{n_streams} streams in {elapsed:.3f}s")
+
+
+def main() -> None:
+    path = sys.argv[1] if len(sys.argv) > 1 else "input.txt"
+    n_streams = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    with open(path, "rb") as f:
+        data = f.read()
+    asyncio.run(run_benchmark(data, n_streams))
+
+
+if __name__ == "__main__":
+    main()
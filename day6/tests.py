@@ -1,7 +1,21 @@
+import asyncio
+import random
 from unittest.mock import mock_open, patch
 
+import pytest
+
+from .main_part_1 import find_marker, find_marker_in_file
 from .main_part_1 import main as main_1
 from .main_part_2 import main as main_2
+from .marker_detector import MarkerDetector, find_markers
+from .parallel_search import find_marker_parallel
+from .stream_detector import (
+    detect_markers_over_tcp,
+    detect_markers_over_unix_socket,
+    iter_markers,
+    start_datastream_server,
+    start_unix_datastream_server,
+)
 
 TEST_INPUTS_1 = [
     "bvwbjplbgvbhsrlpgdmjqwftvncz",
@@ -36,3 +50,124 @@ def test_part_2():
             result = main_2()
             mock_file.assert_called_with("input.txt", "r")
             assert result == ANSWERS_PART_2[i]
+
+
+def find_marker_naive(data, marker_length):
+    for pos in range(marker_length, len(data) + 1):
+        if len(set(data[pos - marker_length : pos])) == marker_length:
+            return pos
+    return None
+
+
+def test_find_marker_matches_naive_search():
+    random.seed(6)
+    for _ in range(200):
+        marker_length = random.randint(1, 8)
+        data = "".join(random.choices("abcdefgh", k=random.randint(0, 60)))
+        chunk_size = random.randint(1, 10)
+        chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+        assert find_marker(chunks, marker_length) == find_marker_naive(data, marker_length)
+
+
+def test_find_marker_in_file(tmp_path):
+    path = tmp_path / "datastream"
+    path.write_bytes(b"mjqjpqmgbljsphdztnvjfqwrcgsmlb")
+    assert find_marker_in_file(str(path), 4) == 7
+    assert find_marker_in_file(str(path), 14) == 19
+
+    path.write_bytes(b"")
+    assert find_marker_in_file(str(path)) is None
+
+
+def test_find_markers_of_many_lengths_in_one_pass():
+    for test_input, answer_1, answer_2 in zip(TEST_INPUTS_1, ANSWERS_PART_1, ANSWERS_PART_2[1:]):
+        assert find_markers([test_input], [4, 14]) == {4: answer_1, 14: answer_2}
+
+    random.seed(21)
+    for _ in range(100):
+        data = "".join(random.choices("abcdefgh", k=random.randint(0, 60)))
+        chunks = [data[i : i + 7] for i in range(0, len(data), 7)]
+        window_lengths = random.sample(range(1, 10), 3)
+        assert find_markers(chunks, window_lengths) == {
+            length: find_marker_naive(data, length) for length in window_lengths
+        }
+
+
+def test_marker_detector_reports_markers_per_chunk():
+    detector = MarkerDetector([4, 14, 1])
+
+    assert detector.feed(b"mjqjpq") == {1: 1}
+    assert detector.feed(b"mgbljsphdz") == {4: 7}
+    assert detector.feed(b"tnvjfqwrcgsmlb") == {14: 19}
+    assert detector.done and detector.pos == 19
+
+
+def test_parallel_search_matches_sequential_search(tmp_path):
+    random.seed(22)
+    path = tmp_path / "datastream"
+    for marker_pos in [None, 3, 250, 255, 256, 257, 999]:
+        data = bytearray(random.choices(b"abc", k=1000))  # too few distinct characters for a marker
+        if marker_pos is not None:
+            data[marker_pos : marker_pos + 4] = b"wxyz"
+            data[marker_pos + 300 : marker_pos + 304] = b"wxyz"  # later markers don't matter
+        path.write_bytes(bytes(data[:1000]))
+
+        expected = find_marker_naive(bytes(data[:1000]), 4)
+        assert find_marker_parallel(path, 4, chunk_size=64, max_workers=2) == expected
+
+
+def test_stream_detector_reports_markers_while_reading():
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"mjqjpqmgbl")
+        markers = iter_markers(reader, [4, 14], read_size=4)
+        assert await markers.__anext__() == (4, 7)  # found before the rest of the stream arrives
+
+        reader.feed_data(b"jsphdztnvjfqwrcgsmlb")
+        reader.feed_eof()
+        assert [marker async for marker in markers] == [(14, 19)]
+
+    asyncio.run(run())
+
+
+def test_stream_detector_over_sockets(tmp_path):
+    data = b"mjqjpqmgbljsphdztnvjfqwrcgsmlb" + bytes(random.choices(b"ab", k=100000))
+
+    async def run():
+        async with await start_datastream_server(data, chunk_size=1000) as server:
+            host, port = server.sockets[0].getsockname()[:2]
+            results = await asyncio.gather(*(detect_markers_over_tcp(host, port, [4, 14, 20]) for _ in range(20)))
+        assert results == [{4: 7, 14: 19, 20: None}] * 20
+
+        socket_path = str(tmp_path / "datastream.sock")
+        async with await start_unix_datastream_server(data, socket_path):
+            assert await detect_markers_over_unix_socket(socket_path, [4, 14]) == {4: 7, 14: 19}
+
+    asyncio.run(run())
+
+
+def find_all_markers_naive(data, marker_length):
+    return [
+        pos for pos in range(marker_length, len(data) + 1) if len(set(data[pos - marker_length : pos])) == marker_length
+    ]
+
+
+def test_all_markers_match_naive_search(tmp_path):
+    pytest.importorskip("numpy")
+    from .all_markers import find_all_markers, iter_marker_positions_in_file
+
+    assert find_all_markers(b"mjqjpqmgbljsphdztnvjfqwrcgsmlb", 14).tolist() == [19, 25, 26, 27, 28, 29, 30]
+
+    random.seed(24)
+    for _ in range(200):
+        marker_length = random.randint(1, 8)
+        data = bytes(random.choices(b"abcdefgh", k=random.randint(0, 60)))
+        positions = find_all_markers(data, marker_length, chunk_size=random.randint(1, 10))
+        assert positions.tolist() == find_all_markers_naive(data, marker_length)
+
+    path = tmp_path / "datastream"
+    data = bytes(random.choices(range(256), k=5000))
+    path.write_bytes(data)
+    positions = list(iter_marker_positions_in_file(str(path), 30, chunk_size=1000))
+    assert len(positions) == 5
+    assert [pos for chunk in positions for pos in chunk.tolist()] == find_all_markers_naive(data, 30)
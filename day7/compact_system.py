@@ -0,0 +1,330 @@
+"""
+Compact, array-backed version of the directory tree for transcripts describing millions of directories.
+
+Directories are integer ids. Every directory is created after its parent, so a child id is always greater than the id
+of its parent. Tree is kept in flat arrays (parent id and size of own files) and file names are not stored at all,
+because only sizes matter for the answers. Directory names are kept as UTF-8 bytes in a single buffer and are decoded
+only when asked for. Child lookup by (parent id, name) goes through an open-addressing hash table stored in an array of
+directory ids, so no Python object is kept per directory.
+"""
+from array import array
+from typing import Generator, Iterable, List, Optional, Union
+
+from .main_part_2 import TOTAL_DISK_SPACE, UNUSED_SPACE_REQUIRED, Command, ListedFile, input_parser
+
+ROOT_ID = 0
+NO_PARENT = -1
+EMPTY_SLOT = -1
+MIN_TABLE_SIZE = 8  # must be a power of two
+
+
+class CompactDirectory:
+    """Lightweight handle to a directory stored in ``CompactSystem``, with the same interface as ``Directory``."""
+
+    __slots__ = ("system", "id")
+
+    def __init__(self, system: "CompactSystem", directory_id: int) -> None:
+        self.system = system
+        self.id = directory_id
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CompactDirectory) and other.system is self.system and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash((id(self.system), self.id))
+
+    def __str__(self) -> str:
+        return self.name + f"(path: {self.path})"
+
+    @property
+    def name(self) -> str:
+        return self.system.get_name(self.id)
+
+    @property
+    def parent(self) -> Optional["CompactDirectory"]:
+        parent_id = self.system.parents[self.id]
+        return None if parent_id == NO_PARENT else CompactDirectory(self.system, parent_id)
+
+    @property
+    def path(self) -> str:
+        """Get absolute path of the directory."""
+        return self.system.get_path(self.id)
+
+    @property
+    def size(self) -> int:
+        """Total size of the directory, including all subdirectories."""
+        return self.system.get_size(self.id)
+
+    def add_file(self, name: str, size: int) -> None:
+        """Create a file in this directory. Only its size is kept."""
+        self.system.add_file(size, directory_id=self.id)
+
+    def add_directory(self, name: str) -> "CompactDirectory":
+        """Create a child directory in this directory."""
+        return CompactDirectory(self.system, self.system.add_directory(name, directory_id=self.id))
+
+
+class CompactSystem:
+    """Directory manager keeping the whole tree in flat arrays, indexed by directory ids.
+
+    It provides the same API as ``System`` (``change_directory``, ``traverse_directories``, ``get_used_space``...),
+    so puzzle queries work with both of them.
+    """
+
+    def __init__(self) -> None:
+        self.parents = array("q")  # <directory id>: <parent id>
+        self.own_sizes = array("q")  # <directory id>: <total size of files located directly in the directory>
+        self._name_offsets = array("q", [0])  # <directory id>: start of its name in ``_name_blob`` (and the end after)
+        self._name_blob = bytearray()  # UTF-8 encoded names of all directories, one after another
+        self._table = array("q", [EMPTY_SLOT]) * MIN_TABLE_SIZE  # hash table of (<parent id>, <name>): <directory id>
+        self._listed = bytearray()  # <directory id>: 1 if content of the directory has already been listed
+        self._skip_listing = False
+        self._sizes: Optional[array] = None  # aggregated sizes, None if they have to be recalculated
+        self.current_directory_id: Optional[int] = None
+
+    @classmethod
+    def from_arrays(
+        cls,
+        parents: array,
+        own_sizes: array,
+        names: List[str],
+        sizes: Optional[array] = None,
+        listed: Optional[bytearray] = None,
+    ) -> "CompactSystem":
+        """Create the system from already built arrays (e.g. loaded from a snapshot), without replaying the input.
+
+        Aggregated ``sizes`` are trusted if given, otherwise they are calculated on the first query.
+        """
+        if not len(parents) == len(own_sizes) == len(names):
+            raise ValueError("All arrays must describe the same number of directories.")
+        system = cls()
+        system.parents = parents
+        system.own_sizes = own_sizes
+        for name in names:
+            system._name_blob += name.encode()
+            system._name_offsets.append(len(system._name_blob))
+        system._rebuild_table()
+        system._listed = listed if listed is not None else bytearray(len(parents))
+        system._sizes = sizes
+        system.current_directory_id = ROOT_ID if len(parents) else None
+        return system
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    @property
+    def root(self) -> Optional[CompactDirectory]:
+        return CompactDirectory(self, ROOT_ID) if self.parents else None
+
+    @property
+    def names(self) -> List[str]:
+        """Names of all directories, decoded from the names buffer on every call."""
+        return [self.get_name(directory_id) for directory_id in range(len(self.parents))]
+
+    @property
+    def listed(self) -> bytearray:
+        """Flags of directories whose content has already been listed (1) or not yet (0)."""
+        return self._listed
+
+    @property
+    def current_directory(self) -> Optional[CompactDirectory]:
+        if self.current_directory_id is None:
+            return None
+        return CompactDirectory(self, self.current_directory_id)
+
+    def get_name(self, directory_id: int) -> str:
+        return self._get_name_bytes(directory_id).decode()
+
+    def _get_name_bytes(self, directory_id: int) -> bytes:
+        return bytes(self._name_blob[self._name_offsets[directory_id] : self._name_offsets[directory_id + 1]])
+
+    def _find_slot(self, parent_id: int, name: bytes) -> int:
+        """Find the slot of the hash table holding the child directory, or the empty slot where it would be stored.
+
+        Collisions are resolved with linear probing. The table is never more than half full, so probes are short.
+        """
+        table, parents, offsets, blob = self._table, self.parents, self._name_offsets, self._name_blob
+        mask = len(table) - 1
+        slot = hash((parent_id, name)) & mask
+        while True:
+            directory_id = table[slot]
+            if directory_id == EMPTY_SLOT:
+                return slot
+            if parents[directory_id] == parent_id:
+                start, end = offsets[directory_id], offsets[directory_id + 1]
+                if end - start == len(name) and blob[start:end] == name:
+                    return slot
+            slot = (slot + 1) & mask
+
+    def _rebuild_table(self) -> None:
+        """Allocate a hash table at most half full for all directories and insert every directory but the root."""
+        table_size = MIN_TABLE_SIZE
+        while table_size < 2 * len(self.parents):
+            table_size *= 2
+        self._table = array("q", [EMPTY_SLOT]) * table_size
+        for directory_id in range(ROOT_ID + 1, len(self.parents)):
+            slot = self._find_slot(self.parents[directory_id], self._get_name_bytes(directory_id))
+            self._table[slot] = directory_id
+
+    def _get_child_id(self, parent_id: int, name: str) -> Optional[int]:
+        directory_id = self._table[self._find_slot(parent_id, name.encode())]
+        return None if directory_id == EMPTY_SLOT else directory_id
+
+    def _create_directory(self, name: str, parent_id: int) -> int:
+        directory_id = len(self.parents)
+        encoded_name = name.encode()
+        self.parents.append(parent_id)
+        self.own_sizes.append(0)
+        self._name_blob += encoded_name
+        self._name_offsets.append(len(self._name_blob))
+        self._listed.append(0)
+        if parent_id != NO_PARENT:
+            if 2 * len(self.parents) > len(self._table):
+                self._rebuild_table()
+            else:
+                self._table[self._find_slot(parent_id, encoded_name)] = directory_id
+        self._sizes = None
+        return directory_id
+
+    def _get_directory_id(self, directory_id: Optional[int]) -> int:
+        directory_id = self.current_directory_id if directory_id is None else directory_id
+        if directory_id is None:
+            raise RuntimeError("System must be in a working directory")
+        return directory_id
+
+    def find_directory(self, name: str, directory_id: Optional[int] = None) -> Optional[int]:
+        """Return id of a child directory (with given name) or of one of the 'special' directories."""
+        directory_id = self._get_directory_id(directory_id)
+        if name == ".":
+            return directory_id
+        if name == "..":
+            parent_id = self.parents[directory_id]
+            return None if parent_id == NO_PARENT else parent_id
+        if name == "/":
+            return ROOT_ID
+        return self._get_child_id(directory_id, name)
+
+    def change_directory(self, name: str) -> None:
+        """
+        Change current working directory to the one with a given name.
+
+        Works the same way as ``System.change_directory``. If directory with a given name hasn't been seen yet, then
+        add it to the directory tree.
+        """
+        self._skip_listing = False
+        if self.current_directory_id is None:
+            self.current_directory_id = self._create_directory(name, NO_PARENT)
+            return
+
+        destination_id = self.find_directory(name)
+        if destination_id is None:
+            destination_id = self.add_directory(name)
+        self.current_directory_id = destination_id
+
+    def list_directory(self) -> None:
+        """Start listing the current directory. Repeated listings of the same directory are ignored."""
+        directory_id = self._get_directory_id(None)
+        self._skip_listing = bool(self._listed[directory_id])
+        self._listed[directory_id] = 1
+
+    def add_file(self, size: int, directory_id: Optional[int] = None) -> None:
+        """Add size of a file to the current (or given) directory.
+
+        Files of a repeated listing of the current directory are ignored, whether the directory is given or not.
+        """
+        if self._skip_listing and directory_id in (None, self.current_directory_id):
+            return
+        self.own_sizes[self._get_directory_id(directory_id)] += size
+        self._sizes = None
+
+    def add_directory(self, name: str, directory_id: Optional[int] = None) -> int:
+        """Create a child directory in the current (or given) directory, unless it already exists. Return its id."""
+        if name in [".", ".."]:
+            raise ValueError("Cannot add '.' and '..' directories.")
+        parent_id = self._get_directory_id(directory_id)
+        existing_id = self._get_child_id(parent_id, name)
+        if existing_id is not None:
+            return existing_id
+        return self._create_directory(name, parent_id)
+
+    @property
+    def sizes(self) -> array:
+        """Total sizes of all directories, aggregated in a single pass from the last directory to the first one.
+
+        Children always have greater ids than their parents, so iterating over ids in reversed order adds every
+        directory size to its parent only after the directory received sizes of all its subdirectories.
+        """
+        if self._sizes is None:
+            sizes = array("q", self.own_sizes)
+            parents = self.parents
+            for directory_id in range(len(sizes) - 1, ROOT_ID, -1):
+                sizes[parents[directory_id]] += sizes[directory_id]
+            self._sizes = sizes
+        return self._sizes
+
+    def get_size(self, directory_id: int) -> int:
+        return self.sizes[directory_id]
+
+    def get_path(self, directory_id: int) -> str:
+        """Get absolute path of the directory (in the same format as ``Directory.path``)."""
+        names = []
+        while directory_id != NO_PARENT:
+            names.append(self.get_name(directory_id))
+            directory_id = self.parents[directory_id]
+        names.reverse()
+        if len(names) > 1 and names[0] == "/":
+            names[0] = "root"
+        return "/".join(names)
+
+    def traverse_directory_ids(self, starting_directory_id: int = ROOT_ID) -> Generator[int, None, None]:
+        """Yield ids of the given directory and all its subdirectories, in the order they were created."""
+        if not self.parents:
+            raise RuntimeError("Missing root directory")
+        yield starting_directory_id
+        parents = self.parents
+        in_subtree = bytearray(len(parents))
+        in_subtree[starting_directory_id] = 1
+        for directory_id in range(starting_directory_id + 1, len(parents)):
+            if in_subtree[parents[directory_id]]:
+                in_subtree[directory_id] = 1
+                yield directory_id
+
+    def traverse_directories(
+        self, starting_directory: Optional[CompactDirectory] = None
+    ) -> Generator[CompactDirectory, None, None]:
+        """Visit and yield every directory in the system starting from root or from given directory."""
+        starting_directory_id = starting_directory.id if starting_directory else ROOT_ID
+        for directory_id in self.traverse_directory_ids(starting_directory_id):
+            yield CompactDirectory(self, directory_id)
+
+    def get_used_space(self) -> int:
+        """Get disk space used by all files."""
+        if not self.parents:
+            raise RuntimeError("Missing root directory")
+        return self.sizes[ROOT_ID]
+
+    def get_unused_space(self) -> int:
+        """Get remaining free disk space."""
+        return TOTAL_DISK_SPACE - self.get_used_space()
+
+    def get_minimum_space_to_free_up(self) -> int:
+        """Get minimum unused space required to run the system update."""
+        return UNUSED_SPACE_REQUIRED - self.get_unused_space()
+
+
+def load_compact_system(lines: Iterable[Union[str, bytes]]) -> CompactSystem:
+    """Build ``CompactSystem`` from lines of the terminal output (text or binary, see ``input_parser``)."""
+    system = CompactSystem()
+    for parsed_line in input_parser(lines):
+        if isinstance(parsed_line, Command):
+            if parsed_line.name == "cd":
+                system.change_directory(parsed_line.parameter)
+            elif parsed_line.name == "ls":
+                system.list_directory()
+            else:
+                raise ValueError(f"Invalid command '{parsed_line.name}'")
+        elif isinstance(parsed_line, ListedFile):
+            system.add_file(parsed_line.size)
+        else:
+            system.add_directory(parsed_line.name)
+    return system
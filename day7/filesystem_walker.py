@@ -0,0 +1,167 @@
+"""
+Build ``System`` by walking a real directory instead of parsing a saved ``cd``/``ls`` transcript.
+
+Directories are listed with ``os.scandir`` in a thread pool, so ``stat`` calls of different subtrees overlap their I/O.
+Only worker threads touch the disk; the directory tree itself is modified by the calling thread only.
+
+Usage (prints both puzzle answers for a real directory and compares speed with parsing an equivalent transcript)::
+
+    python -m day7.filesystem_walker [PATH]
+"""
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from .main_part_1 import MAX_DIR_SIZE
+from .main_part_2 import (
+    Command,
+    Directory,
+    ListedFile,
+    System,
+    handle_command,
+    handle_listed_directory,
+    handle_listed_file,
+    input_parser,
+)
+
+ROOT_NAME = "/"
+
+ScannedDirectory = Tuple[List[Tuple[str, int]], List[Tuple[str, str]]]  # files (name, size), directories (name, path)
+
+
+def scan_directory(path: str, skip_symlinks: bool = True) -> ScannedDirectory:
+    """List files (with their sizes) and subdirectories of a single directory.
+
+    Entries that can't be read (e.g. removed in the meantime or without permissions) are skipped, as ``du`` does.
+    """
+    files, directories = [], []
+    follow_symlinks = not skip_symlinks
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if skip_symlinks and entry.is_symlink():
+                        continue
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        directories.append((entry.name, entry.path))
+                    elif entry.is_file(follow_symlinks=follow_symlinks):
+                        files.append((entry.name, entry.stat(follow_symlinks=follow_symlinks).st_size))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, directories
+
+
+def load_system_from_filesystem(
+    path: Union[str, os.PathLike],
+    system: Optional[System] = None,
+    max_workers: int = 8,
+    skip_symlinks: bool = True,
+) -> System:
+    """Fill the directory tree of ``system`` (a new ``System`` by default) with content of a real directory.
+
+    At most ``max_workers`` directories are scanned at the same time and at most twice as many scans are queued, so
+    memory used by pending results stays bounded even for very wide trees. With ``skip_symlinks=False`` symbolic links
+    are followed, but every real directory is visited only once, so link cycles don't cause an endless walk.
+    """
+    if max_workers < 1:
+        raise ValueError("At least one worker is required")
+    system = system or System()
+    system.change_directory(ROOT_NAME)
+    root = system.root
+    if root is None:
+        raise RuntimeError("Missing root directory")
+
+    to_scan: List[Tuple[Directory, str]] = [(root, os.fspath(path))]
+    visited: Set[Tuple[int, int]] = set()  # (device, inode) of visited directories, used only when links are followed
+    pending: Dict[Future, Directory] = {}
+    max_pending = 2 * max_workers
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while to_scan or pending:
+            while to_scan and len(pending) < max_pending:
+                directory, directory_path = to_scan.pop()
+                if not skip_symlinks:
+                    try:
+                        stat = os.stat(directory_path)
+                    except OSError:
+                        continue
+                    if (stat.st_dev, stat.st_ino) in visited:
+                        continue
+                    visited.add((stat.st_dev, stat.st_ino))
+                pending[executor.submit(scan_directory, directory_path, skip_symlinks)] = directory
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory = pending.pop(future)
+                files, directories = future.result()
+                for name, size in files:
+                    directory.add_file(name, size)
+                for name, directory_path in directories:
+                    to_scan.append((directory.add_directory(name), directory_path))
+
+    system.current_directory = root
+    return system
+
+
+def get_transcript_name(name: str) -> str:
+    """Names with whitespace can't be represented in the puzzle input format, so whitespace is replaced with "_"."""
+    return "_".join(name.split()) or "_"
+
+
+def generate_transcript(system: System) -> Iterator[str]:
+    """Generate terminal output (in the puzzle input format) that describes the directory tree of ``system``."""
+    if system.root is None:
+        raise RuntimeError("Missing root directory")
+    yield f"$ cd {system.root.name}"
+    stack: List[Optional[Directory]] = [system.root]
+    while stack:
+        directory = stack.pop()
+        if directory is None:  # all subdirectories have been visited
+            yield "$ cd .."
+            continue
+        if directory is not system.root:
+            yield f"$ cd {get_transcript_name(directory.name)}"
+            stack.append(None)
+        yield "$ ls"
+        for child in directory.child_directories:
+            yield f"dir {get_transcript_name(child.name)}"
+        for name, size in directory.files.items():
+            yield f"{size} {get_transcript_name(name)}"
+        stack.extend(reversed(directory.child_directories))
+
+
+def main() -> None:
+    path = sys.argv[1] if len(sys.argv) > 1 else "."
+
+    start = time.perf_counter()
+    system = load_system_from_filesystem(path)
+    walk_time = time.perf_counter() - start
+
+    directories = list(system.traverse_directories())
+    minimum_space_to_free_up = system.get_minimum_space_to_free_up()
+    print(f"Directories: {len(directories)}, used space: {system.get_used_space()}")
+    print(f"Part 1: {sum(d.size for d in directories if d.size <= MAX_DIR_SIZE)}")
+    print(f"Part 2: {min((d.size for d in directories if d.size >= minimum_space_to_free_up), default=None)}")
+
+    transcript = list(generate_transcript(system))
+    start = time.perf_counter()
+    parsed_system = System()
+    for parsed_line in input_parser(transcript):
+        if isinstance(parsed_line, Command):
+            handle_command(parsed_line, parsed_system)
+        elif isinstance(parsed_line, ListedFile):
+            handle_listed_file(parsed_line, parsed_system)
+        else:
+            handle_listed_directory(parsed_line, parsed_system)
+    parse_time = time.perf_counter() - start
+
+    print(f"Filesystem walk: {walk_time:.3f}s ({len(directories) / walk_time:.0f} directories/s)")
+    print(f"Transcript parsing ({len(transcript)} lines): {parse_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Live answers while the terminal output is still being written.
+
+``LiveDirectory`` keeps its total size up to date: every added file pushes its size up the chain of ancestors, so used
+space, free space and sizes of all directories can be read at any moment in O(1). Every change also bumps the version
+of the tree, so ``LiveSystem`` rebuilds its sorted ``SizeIndex`` only when it's queried after the tree has changed.
+``TranscriptFollower`` tails a growing transcript file and feeds only the newly appended lines into ``LiveSystem``.
+"""
+import os
+from typing import Iterable, Optional, Union
+
+from .main_part_2 import (
+    Command,
+    Directory,
+    ListedFile,
+    System,
+    handle_command,
+    handle_listed_directory,
+    handle_listed_file,
+    input_parser,
+)
+from .size_index import SizeIndex
+
+
+class LiveDirectory(Directory):
+    """Directory with total size updated incrementally whenever its content (or content of a subdirectory) changes."""
+
+    def __init__(self, name: str, parent: Optional["LiveDirectory"] = None) -> None:
+        super().__init__(name, parent=parent)
+        self._size = 0  # new directory is empty
+        self.version = 0  # number of changes of the whole tree, counted by the root only
+
+    @property
+    def root(self) -> "LiveDirectory":
+        directory = self
+        while directory.parent is not None:
+            directory = directory.parent
+        return directory
+
+    def add_file(self, name: str, size: int) -> None:
+        """Create (or overwrite) a file in this directory and add its size to this directory and all its ancestors."""
+        size_delta = size - self.files.get(name, 0)
+        self.files[name] = size
+        self.propagate_size_delta(size_delta)
+
+    def add_directory(self, name: str) -> "LiveDirectory":
+        """Create a child directory in this directory, unless it already exists. Return the child directory."""
+        if name in [".", ".."]:
+            raise ValueError("Cannot add '.' and '..' directories.")
+        existing_directory = self.directories.get(name)
+        if existing_directory is not None:
+            return existing_directory  # listed again, e.g. by a repeated `ls`, so its content must be kept
+        directory = LiveDirectory(name, parent=self)
+        self.directories[name] = directory
+        self.root.version += 1
+        return directory
+
+    def propagate_size_delta(self, size_delta: int) -> None:
+        """Change total size of this directory and all its ancestors by ``size_delta``."""
+        if not size_delta:
+            return
+        directory = self
+        while True:
+            directory._size = directory.size + size_delta
+            if directory.parent is None:
+                break
+            directory = directory.parent
+        directory.version += 1  # directory is the root now
+
+
+class LiveSystem(System):
+    """Directory manager that can be fed with the terminal output line by line and queried at any point."""
+
+    directory_class = LiveDirectory
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._size_index: Optional[SizeIndex] = None  # sorted sizes as of ``_indexed_version`` of the tree
+        self._indexed_version = 0
+
+    def feed(self, lines: Iterable[Union[str, bytes]]) -> int:
+        """Apply (complete) lines of the terminal output to the directory tree. Return number of applied lines."""
+        n_lines = 0
+        for parsed_line in input_parser(lines):
+            if isinstance(parsed_line, Command):
+                handle_command(parsed_line, self)
+            elif isinstance(parsed_line, ListedFile):
+                handle_listed_file(parsed_line, self)
+            else:
+                handle_listed_directory(parsed_line, self)
+            n_lines += 1
+        return n_lines
+
+    def get_used_space(self) -> int:
+        """Get disk space used by all files seen so far (0 before the first directory is entered)."""
+        return self.root.size if self.root else 0
+
+    def find_directory_to_delete(self) -> Optional[Directory]:
+        """Find the current best candidate for deletion, i.e. the smallest directory freeing up enough space.
+
+        Sorted ``SizeIndex`` of all directories is rebuilt only if the tree has changed since the previous query, so
+        feeding lines never pays for sorting and repeated queries are a single bisect. Like
+        ``SizeIndex.find_directory_to_delete``, the smallest directory is returned if there is already enough unused
+        space, and None only before the first directory is entered.
+        """
+        if self.root is None:
+            return None
+        if self._size_index is None or self._indexed_version != self.root.version:
+            self._size_index = SizeIndex.from_system(self)
+            self._indexed_version = self.root.version
+        return self._size_index.find_directory_to_delete()
+
+
+class TranscriptFollower:
+    """Follow a transcript file that is still being appended to, like ``tail -f``.
+
+    Every ``update`` reads only the bytes appended since the previous one. Last line is applied only once it is
+    complete (terminated with a new line), so a line that is still being written is never parsed in halves.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], system: Optional[LiveSystem] = None) -> None:
+        self.path = path
+        self.system = system or LiveSystem()
+        self.offset = 0  # number of bytes of the file already consumed (including the incomplete line)
+        self._incomplete_line = b""
+
+    def update(self) -> int:
+        """Read newly appended lines and apply them. Return number of applied lines."""
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        if not data:
+            return 0
+        self.offset += len(data)
+        lines = (self._incomplete_line + data).split(b"\n")
+        self._incomplete_line = lines.pop()  # empty if data ends with a new line
+        return self.system.feed(line for line in lines if line)
+
+    def finish(self) -> int:
+        """Apply the last line even if it's not terminated with a new line (e.g. when the writer has finished)."""
+        n_lines = self.update()
+        if self._incomplete_line:
+            n_lines += self.system.feed([self._incomplete_line])
+            self._incomplete_line = b""
+        return n_lines
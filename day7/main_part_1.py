@@ -98,20 +98,16 @@ directories?
 https://adventofcode.com/2022/day/7
 """
 
-import re
+import io
+import mmap
 from collections import namedtuple
-from typing import Dict, Generator, Iterable, List, Optional, TextIO, Tuple
-
-COMMAND_REGEX = re.compile(r"^\$ (?P<command_name>cd|ls)( (?P<command_parameter>[\w/\.]+))?$")
-LISTED_FILE_REGEX = re.compile(r"^(?P<file_size>\d+) (?P<file_name>[\w+\.]+)$")
-LISTED_DIR_REGEX = re.compile(r"^dir (?P<directory_name>[\w+\.]+)$")
-
+from typing import Dict, Generator, Iterable, Iterator, List, Optional, TextIO, Tuple, Type, Union
 
 Command = namedtuple("Command", ["name", "parameter"])
 ListedFile = namedtuple("ListedFile", ["name", "size"])
 ListedDirectory = namedtuple("ListedDirectory", ["name"])
 
-ParsedLineType = Tuple[Optional[Command], Optional[ListedFile], Optional[ListedDirectory]]
+ParsedLineType = Union[Command, ListedFile, ListedDirectory]
 
 MAX_DIR_SIZE = 100000
 
@@ -124,18 +120,33 @@ class Directory:
         self.parent = parent
         self.directories: Dict[str, "Directory"] = {}  # <name>: <Directory>
         self.files: Dict[str, int] = {}  # <name>: <size>
+        self._size: Optional[int] = None  # cached total size, None if it has to be recalculated
 
     def add_file(self, name: str, size: int) -> None:
         """Create a file in this directory."""
         self.files[name] = size
+        self.invalidate_size()
 
     def add_directory(self, name: str) -> "Directory":
-        """Create a child directory in this directory."""
+        """Create a child directory in this directory, unless it already exists. Return the child directory."""
         if name in [".", ".."]:
             raise ValueError("Cannot add '.' and '..' directories.")
+        existing_directory = self.directories.get(name)
+        if existing_directory is not None:
+            return existing_directory  # listed again, e.g. by a repeated `ls`, so its content must be kept
         self.directories[name] = Directory(name, parent=self)
+        self.invalidate_size()
         return self.directories[name]
 
+    def invalidate_size(self) -> None:
+        """Drop cached size of this directory and all its ancestors, because their content has changed."""
+        directory: Optional[Directory] = self
+        # Size of a directory is cached only if sizes of all its subdirectories are cached, so ancestors of a directory
+        # without cached size can't have it cached either.
+        while directory is not None and directory._size is not None:
+            directory._size = None
+            directory = directory.parent
+
     def find_directory(self, name: str) -> Optional["Directory"]:
         """Return regular, child directory (with given name) or one of the 'special' directories."""
         if name == ".":
@@ -149,41 +160,87 @@ class Directory:
 
     @property
     def path(self) -> str:
-        """Get absolute path of the directory."""
-        if self.parent:
-            return ("root" if self.parent.path == "/" else self.parent.path) + "/" + self.name
-        else:
-            return self.name
+        """Get absolute path of the directory.
+
+        Path is built on demand by walking up to the root, without recursion, so it works for trees of any depth.
+        """
+        names = []
+        directory: Optional[Directory] = self
+        while directory is not None:
+            names.append(directory.name)
+            directory = directory.parent
+        names.reverse()
+        if len(names) > 1 and names[0] == "/":
+            names[0] = "root"
+        return "/".join(names)
 
     @property
     def size(self) -> int:
         """
         Count the size of a directory. Total size is a sum of all files and directories sizes located in this directory.
+
+        Size is calculated once (together with sizes of all subdirectories) and cached until the content of the
+        directory changes, so every following lookup is O(1).
         """
-        return sum(self.files.values()) + sum(directory.size for directory in self.child_directories)
+        if self._size is None:
+            # Collect directories without cached size (parents before children) and then calculate their sizes in
+            # reversed order, so sizes of all subdirectories are always known. No recursion is used, so depth of the
+            # tree is not limited.
+            uncached_directories = []
+            stack = [self]
+            while stack:
+                directory = stack.pop()
+                uncached_directories.append(directory)
+                stack.extend(child for child in directory.child_directories if child._size is None)
+            for directory in reversed(uncached_directories):
+                directory._size = sum(directory.files.values()) + sum(
+                    child.size for child in directory.child_directories  # already cached
+                )
+        return self._size
 
     @property
     def child_directories(self) -> List["Directory"]:
         """Return list of all "normal" directories located in this one. Special directories are skipped."""
         return list(self.directories.values())
 
-    def tree_representation(self, indent_level: int = 0) -> str:
+    def tree_representation(self, indent_level: int = 0, max_depth: Optional[int] = None) -> str:
         """
         Get a graphical representation of the directory tree.
         """
-        lines = []
-        indent = "\t" * indent_level
-        lines.append(indent + " - " + self.name + " (dir):")
-        for directory in self.child_directories:
-            directory.tree_representation(indent_level + 1)
-        for name, size in self.files.items():
-            lines.append(indent + "\t" + " - " + name + f" (file, size={size})")
-        return "\n".join(lines)
+        output = io.StringIO()
+        self.write_tree(output, indent_level=indent_level, max_depth=max_depth)
+        return output.getvalue().rstrip("\n")
+
+    def write_tree(self, file: TextIO, indent_level: int = 0, max_depth: Optional[int] = None) -> None:
+        """
+        Write a graphical representation of the directory tree to a file object, line by line.
+
+        Subdirectories are shown before files of a directory. With ``max_depth``, only directories at most
+        ``max_depth`` levels below this one are shown. Only one iterator per tree level is kept in memory, so big trees
+        can be written without building the whole representation.
+        """
+        file.write("\t" * indent_level + " - " + self.name + " (dir):\n")
+        stack: List[Tuple[Directory, int, Iterator[Directory]]] = [(self, indent_level, iter(self.child_directories))]
+        while stack:
+            directory, level, subdirectories = stack[-1]
+            subdirectory = None
+            if max_depth is None or level - indent_level < max_depth:
+                subdirectory = next(subdirectories, None)
+            if subdirectory is not None:
+                file.write("\t" * (level + 1) + " - " + subdirectory.name + " (dir):\n")
+                stack.append((subdirectory, level + 1, iter(subdirectory.child_directories)))
+                continue
+            indent = "\t" * level
+            for name, size in directory.files.items():
+                file.write(indent + "\t" + " - " + name + f" (file, size={size})\n")
+            stack.pop()
 
 
 class System:
     """Simple directory manager able to change current directory or traverse all of them."""
 
+    directory_class: Type[Directory] = Directory  # class of the root directory
+
     def __init__(self) -> None:
         self.current_directory: Optional[Directory] = None
         self.root: Optional[Directory] = None
@@ -200,7 +257,7 @@ class System:
         """
         if self.current_directory is None:
             # This is only the initial state, because later system is always in a directory.
-            self.root = Directory(name, parent=None)
+            self.root = self.directory_class(name, parent=None)
             self.current_directory = self.root
             return
 
@@ -210,30 +267,76 @@ class System:
         else:
             self.current_directory = destination_directory
 
+    def list_directory(self) -> None:
+        """Start listing the current directory.
+
+        Files are stored by name and existing directories are kept, so repeated listings change nothing.
+        """
+
     def traverse_directories(self, starting_directory: Optional[Directory] = None) -> Generator[Directory, None, None]:
         """Visit and yield every directory in the system starting from root or from given directory."""
         starting_directory = starting_directory or self.root
         if starting_directory is None:
             raise RuntimeError("Missing root directory")
-        yield starting_directory
-        for directory in starting_directory.child_directories:
-            yield from self.traverse_directories(directory)
-
-
-def input_parser(file_handler: TextIO) -> Generator[ParsedLineType, None, None]:
-    """Parse each line of the "terminal output" (this puzzle input) into specific type."""
-    for line in file_handler:
-        command, listed_file, listed_directory = None, None, None
-        match = COMMAND_REGEX.match(line)
-        if match:
-            command = Command(name=match.group("command_name"), parameter=match.group("command_parameter"))
-        match = LISTED_FILE_REGEX.match(line)
-        if match:
-            listed_file = ListedFile(name=match.group("file_name"), size=int(match.group("file_size")))
-        match = LISTED_DIR_REGEX.match(line)
-        if match:
-            listed_directory = ListedDirectory(name=match.group("directory_name"))
-        yield command, listed_file, listed_directory
+        # Depth-first, parent before its children (same order as a recursive traversal), but with an explicit stack
+        stack = [starting_directory]
+        while stack:
+            directory = stack.pop()
+            yield directory
+            stack.extend(reversed(directory.child_directories))
+
+
+def parse_line(line: str) -> ParsedLineType:
+    """Parse a line of the terminal output. Kind of the line is recognized by its first character."""
+    first_char = line[:1]
+    if first_char == "$":
+        parts = line.split()
+        if len(parts) in (2, 3):
+            return Command(name=parts[1], parameter=parts[2] if len(parts) == 3 else None)
+    elif first_char == "d":
+        parts = line.split()
+        if len(parts) == 2 and parts[0] == "dir":
+            return ListedDirectory(name=parts[1])
+    elif first_char.isdigit():
+        parts = line.split()
+        if len(parts) == 2 and parts[0].isdigit():
+            return ListedFile(name=parts[1], size=int(parts[0]))
+    raise ValueError(f"Invalid line '{line.rstrip()}'")
+
+
+def parse_binary_line(line: bytes) -> ParsedLineType:
+    """Parse a raw line of the terminal output. Only names are decoded, sizes are converted straight from bytes."""
+    first_char = line[:1]
+    if first_char == b"$":
+        parts = line.split()
+        if len(parts) in (2, 3):
+            return Command(name=parts[1].decode(), parameter=parts[2].decode() if len(parts) == 3 else None)
+    elif first_char == b"d":
+        parts = line.split()
+        if len(parts) == 2 and parts[0] == b"dir":
+            return ListedDirectory(name=parts[1].decode())
+    elif first_char.isdigit():
+        parts = line.split()
+        if len(parts) == 2 and parts[0].isdigit():
+            return ListedFile(name=parts[1].decode(), size=int(parts[0]))
+    raise ValueError(f"Invalid line {line.rstrip()!r}")
+
+
+def iter_buffer_lines(buffer: Union[bytes, mmap.mmap]) -> Iterator[bytes]:
+    """Iterate over lines of a binary buffer or a memory-mapped file without decoding them."""
+    if isinstance(buffer, mmap.mmap):
+        buffer.seek(0)
+        return iter(buffer.readline, b"")
+    return iter(io.BytesIO(buffer))
+
+
+def input_parser(lines: Iterable[Union[str, bytes]]) -> Generator[ParsedLineType, None, None]:
+    """Parse each line of the "terminal output" (this puzzle input) into specific type.
+
+    Lines can be read from a text file, a binary file or a binary buffer (see ``iter_buffer_lines``).
+    """
+    for line in lines:
+        yield parse_binary_line(line) if isinstance(line, bytes) else parse_line(line)
 
 
 def handle_command(command: Command, system: System) -> None:
@@ -241,7 +344,7 @@ def handle_command(command: Command, system: System) -> None:
     if command.name == "cd":
         system.change_directory(command.parameter)
     elif command.name == "ls":
-        pass  # Skip
+        system.list_directory()
     else:
         raise ValueError(f"Invalid command '{command.name}'")
 
@@ -271,15 +374,13 @@ def find_directories(system: System) -> Iterable[Directory]:
 def main() -> int:
     with open("input.txt", "r") as f:
         system = System()
-        for command, listed_file, listed_directory in input_parser(f):
-            if command:
-                handle_command(command, system)
-            elif listed_file:
-                handle_listed_file(listed_file, system)
-            elif listed_directory:
-                handle_listed_directory(listed_directory, system)
+        for parsed_line in input_parser(f):
+            if isinstance(parsed_line, Command):
+                handle_command(parsed_line, system)
+            elif isinstance(parsed_line, ListedFile):
+                handle_listed_file(parsed_line, system)
             else:
-                raise ValueError(f"Invalid line at {f.tell()}")
+                handle_listed_directory(parsed_line, system)
 
         filtered_directories = find_directories(system)
         result = sum(d.size for d in filtered_directories)
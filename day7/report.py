@@ -0,0 +1,21 @@
+"""
+``du``-style report of the largest directories.
+
+Only ``n`` directories are kept in a heap while all directories are visited, so the report costs O(D log n) for D
+directories instead of sorting all of them.
+"""
+import heapq
+from typing import Any, List, TextIO
+
+
+def find_largest_directories(system: Any, n: int) -> List[Any]:
+    """Return ``n`` largest directories of ``System`` (or ``CompactSystem``), from the largest one."""
+    return heapq.nlargest(n, system.traverse_directories(), key=lambda d: d.size)
+
+
+def write_largest_directories_report(system: Any, file: TextIO, n: int = 10) -> None:
+    """Write sizes and paths of ``n`` largest directories to a file object, one directory per line."""
+    largest_directories = find_largest_directories(system, n)
+    size_width = len(str(largest_directories[0].size)) if largest_directories else 0
+    for directory in largest_directories:
+        file.write(f"{directory.size:>{size_width}}\t{directory.path}\n")
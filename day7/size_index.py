@@ -0,0 +1,74 @@
+"""
+Sorted index of directory sizes for answering many threshold queries against the same directory tree.
+
+Both puzzle questions are threshold queries over directory sizes: part 1 sums sizes of all directories of at most
+``MAX_DIR_SIZE`` and part 2 looks for the smallest directory of at least the space required by the update. With sizes
+sorted once (plus their prefix sums), every query is a bisect instead of a pass over all directories.
+"""
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Generic, List, Optional, TypeVar
+
+from .main_part_2 import TOTAL_DISK_SPACE, UNUSED_SPACE_REQUIRED
+
+DirectoryType = TypeVar("DirectoryType")
+
+
+class SizeIndex(Generic[DirectoryType]):
+    """Directories of a parsed system sorted by their total size, with prefix sums of the sizes."""
+
+    def __init__(self, directories: List[DirectoryType], sizes: List[int]) -> None:
+        if len(directories) != len(sizes):
+            raise ValueError("Every directory must have exactly one size.")
+        order = sorted(range(len(sizes)), key=sizes.__getitem__)
+        self.directories = [directories[i] for i in order]
+        self.sizes = [sizes[i] for i in order]
+        self.prefix_sums = list(accumulate(self.sizes, initial=0))  # prefix_sums[i] is the sum of i smallest sizes
+
+    @classmethod
+    def from_system(cls, system: Any) -> "SizeIndex":
+        """Build the index over all directories of ``System`` (or ``CompactSystem``)."""
+        directories = list(system.traverse_directories())
+        return cls(directories, [directory.size for directory in directories])
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def used_space(self) -> int:
+        """Disk space used by all files, i.e. size of the biggest directory (the root)."""
+        if not self.sizes:
+            raise RuntimeError("Missing root directory")
+        return self.sizes[-1]
+
+    def find_smallest_directory_at_least(self, min_size: int) -> Optional[DirectoryType]:
+        """Return the smallest directory with total size of at least ``min_size`` (or None if there isn't one)."""
+        position = bisect_left(self.sizes, min_size)
+        return self.directories[position] if position < len(self.sizes) else None
+
+    def get_smallest_size_at_least(self, min_size: int) -> Optional[int]:
+        """Return total size of the smallest directory with total size of at least ``min_size``."""
+        position = bisect_left(self.sizes, min_size)
+        return self.sizes[position] if position < len(self.sizes) else None
+
+    def count_directories_at_most(self, max_size: int) -> int:
+        """Count directories with total size of at most ``max_size``."""
+        return bisect_right(self.sizes, max_size)
+
+    def get_total_size_at_most(self, max_size: int) -> int:
+        """Sum total sizes of all directories with total size of at most ``max_size``."""
+        return self.prefix_sums[bisect_right(self.sizes, max_size)]
+
+    def get_minimum_space_to_free_up(
+        self, total_disk_space: int = TOTAL_DISK_SPACE, unused_space_required: int = UNUSED_SPACE_REQUIRED
+    ) -> int:
+        """Get minimum space that has to be freed up to have ``unused_space_required`` on the disk."""
+        return unused_space_required - (total_disk_space - self.used_space)
+
+    def find_directory_to_delete(
+        self, total_disk_space: int = TOTAL_DISK_SPACE, unused_space_required: int = UNUSED_SPACE_REQUIRED
+    ) -> Optional[DirectoryType]:
+        """Find the smallest directory that frees up enough space when deleted (part 2 for any disk parameters)."""
+        return self.find_smallest_directory_at_least(
+            self.get_minimum_space_to_free_up(total_disk_space, unused_space_required)
+        )
@@ -0,0 +1,144 @@
+"""
+Binary snapshots of parsed directory trees, so the terminal output doesn't have to be parsed on every run.
+
+Snapshot is a header followed by flat arrays of ``CompactSystem`` (little-endian)::
+
+    header      magic, format version, SHA-256 of the transcript, number of directories, length of the name table
+    parents     int64 per directory
+    own sizes   int64 per directory
+    sizes       int64 per directory (aggregated total sizes)
+    name ids    uint32 per directory, index into the name table
+    listed      uint8 per directory
+    name table  UTF-8 encoded unique names separated with NUL characters
+
+Snapshot is bound to the content hash of the transcript it was built from, so a snapshot of a different (or changed)
+transcript is never used.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .compact_system import NO_PARENT, CompactSystem, load_compact_system
+from .main_part_2 import iter_buffer_lines
+
+MAGIC = b"AOC7SNAP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sI32sQQ")
+NAME_SEPARATOR = "\0"  # can't be a part of any file name
+SNAPSHOT_SUFFIX = ".snapshot"
+
+PathType = Union[str, os.PathLike]
+
+
+def get_transcript_hash(path: PathType) -> bytes:
+    """Calculate SHA-256 digest of the transcript file, reading it in large blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def _to_little_endian(values: array) -> array:
+    if sys.byteorder == "little":
+        return values
+    values = array(values.typecode, values)
+    values.byteswap()
+    return values
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def save_snapshot(system: CompactSystem, path: PathType, transcript_hash: bytes) -> None:
+    """Write the system to a binary snapshot file, bound to the given transcript hash."""
+    name_ids: Dict[str, int] = {}
+    ids = array("I", (name_ids.setdefault(name, len(name_ids)) for name in system.names))
+    names_blob = NAME_SEPARATOR.join(name_ids).encode()
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, transcript_hash, len(system), len(names_blob)))
+        for values in (system.parents, system.own_sizes, system.sizes, ids):
+            _to_little_endian(values).tofile(f)
+        f.write(system.listed)
+        f.write(names_blob)
+
+
+def load_snapshot(path: PathType, transcript_hash: Optional[bytes] = None) -> Optional[CompactSystem]:
+    """Load the system from a binary snapshot file.
+
+    None is returned if the file is not a valid snapshot or (if ``transcript_hash`` is given) if it was built from a
+    different transcript.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _read_snapshot(mapped, transcript_hash)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_snapshot(data: mmap.mmap, transcript_hash: Optional[bytes]) -> Optional[CompactSystem]:
+    if len(data) < HEADER.size:
+        return None
+    magic, version, snapshot_hash, n_directories, names_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    if transcript_hash is not None and snapshot_hash != transcript_hash:
+        return None
+
+    offset = HEADER.size
+    arrays: List[array] = []
+    for typecode in ("q", "q", "q", "I"):
+        length = n_directories * array(typecode).itemsize
+        arrays.append(_from_little_endian(typecode, data[offset : offset + length]))
+        offset += length
+    listed = bytearray(data[offset : offset + n_directories])
+    offset += n_directories
+    names_blob = data[offset : offset + names_length]
+    if offset + names_length != len(data) or len(listed) != n_directories:
+        return None
+    parents, own_sizes, sizes, ids = arrays
+    # Every directory is stored after its parent, which is what aggregation and traversal of ``CompactSystem`` rely on
+    if n_directories and parents[0] != NO_PARENT:
+        return None
+    if any(not 0 <= parent_id < directory_id for directory_id, parent_id in enumerate(parents) if directory_id):
+        return None
+
+    name_table = [sys.intern(name) for name in names_blob.decode().split(NAME_SEPARATOR)]
+    if ids and max(ids) >= len(name_table):
+        return None
+    names = [name_table[name_id] for name_id in ids]
+    return CompactSystem.from_arrays(parents, own_sizes, names, sizes=sizes, listed=listed)
+
+
+def load_compact_system_cached(transcript_path: PathType, snapshot_path: Optional[PathType] = None) -> CompactSystem:
+    """Load the system built from the transcript, using its snapshot if possible.
+
+    Snapshot is stored next to the transcript by default. It is used only if it was built from a transcript with
+    identical content, otherwise the transcript is parsed (from a memory-mapped file) and the snapshot is rewritten.
+    """
+    snapshot_path = snapshot_path or Path(transcript_path).with_name(Path(transcript_path).name + SNAPSHOT_SUFFIX)
+    transcript_hash = get_transcript_hash(transcript_path)
+
+    system = load_snapshot(snapshot_path, transcript_hash)
+    if system is not None:
+        return system
+
+    with open(transcript_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                system = load_compact_system(iter_buffer_lines(mapped))
+        else:
+            system = CompactSystem()
+    save_snapshot(system, snapshot_path, transcript_hash)
+    return system
@@ -1,7 +1,34 @@
+import io
+import mmap
+import tempfile
+import time
+import tracemalloc
 from unittest.mock import mock_open, patch
 
+import pytest
+
+from .compact_system import ROOT_ID, CompactSystem, load_compact_system
+from .filesystem_walker import generate_transcript, load_system_from_filesystem
+from .live_system import LiveSystem, TranscriptFollower
+from .main_part_1 import MAX_DIR_SIZE
 from .main_part_1 import main as main_1
+from .main_part_2 import (
+    Command,
+    Directory,
+    ListedDirectory,
+    ListedFile,
+    System,
+    find_directories,
+    handle_command,
+    handle_listed_directory,
+    handle_listed_file,
+    input_parser,
+    iter_buffer_lines,
+)
 from .main_part_2 import main as main_2
+from .report import find_largest_directories, write_largest_directories_report
+from .size_index import SizeIndex
+from .snapshot import HEADER, get_transcript_hash, load_compact_system_cached, load_snapshot, save_snapshot
 
 TEST_INPUT = """
 $ cd /
@@ -29,6 +56,19 @@ $ ls
 7214296 k
 """.strip()
 
+
+def load_system(lines, system=None):
+    system = system if system is not None else System()
+    for parsed_line in input_parser(lines):
+        if isinstance(parsed_line, Command):
+            handle_command(parsed_line, system)
+        elif isinstance(parsed_line, ListedFile):
+            handle_listed_file(parsed_line, system)
+        else:
+            handle_listed_directory(parsed_line, system)
+    return system
+
+
 ANSWER_PART_1 = 95437
 ANSWER_PART_2 = 24933642
 
@@ -47,3 +87,313 @@ def test_part_2(mock_file):
 
     mock_file.assert_called_with("input.txt", "r")
     assert result == ANSWER_PART_2
+
+
+def test_directory_size_is_recalculated_after_changes():
+    root = Directory("/")
+    child = root.add_directory("a")
+    child.add_file("f", 10)
+    assert root.size == 10
+
+    child.add_directory("b").add_file("g", 5)
+    assert child.size == 15
+    assert root.size == 15
+
+    root.add_file("h", 1)
+    assert root.size == 16
+    assert child.size == 15
+
+
+def test_input_parser_events():
+    events = list(input_parser(["$ cd /\n", "$ ls\n", "dir a\n", "14848514 b.txt\n"]))
+
+    assert events == [
+        Command(name="cd", parameter="/"),
+        Command(name="ls", parameter=None),
+        ListedDirectory(name="a"),
+        ListedFile(name="b.txt", size=14848514),
+    ]
+
+
+def test_input_parser_accepts_binary_buffers():
+    expected = list(input_parser(TEST_INPUT.splitlines()))
+    data = TEST_INPUT.encode()
+
+    assert list(input_parser(iter_buffer_lines(data))) == expected
+    with tempfile.TemporaryFile() as f:
+        f.write(data)
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            assert list(input_parser(iter_buffer_lines(mapped))) == expected
+
+
+@pytest.mark.parametrize("line", ["", "$", "dir", "dir a b", "12", "12a b", "xyz"])
+def test_input_parser_rejects_invalid_lines(line):
+    with pytest.raises(ValueError):
+        list(input_parser([line]))
+    with pytest.raises(ValueError):
+        list(input_parser([line.encode()]))
+
+
+def test_compact_system_matches_system():
+    system = load_system(TEST_INPUT.splitlines())
+    compact_system = load_compact_system(TEST_INPUT.splitlines())
+
+    assert compact_system.get_used_space() == system.get_used_space()
+    assert {d.path: d.size for d in compact_system.traverse_directories()} == {
+        d.path: d.size for d in system.traverse_directories()
+    }
+    assert min(d.size for d in find_directories(compact_system)) == ANSWER_PART_2
+
+
+def test_compact_system_memory_and_lookups_on_many_directories():
+    lines = ["$ cd /", "$ ls"] + [f"dir top{i}" for i in range(200)]
+    for i in range(200):
+        lines += [f"$ cd top{i}", "$ ls", f"{i + 1} f.txt"] + [f"dir {name}" for name in ("src", "tmp", "żółw")] * 30
+        lines += ["$ cd żółw", "$ ls", "7 a", "$ cd ..", "$ cd .."]
+
+    tracemalloc.start()
+    system = load_system(lines)
+    system_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    compact_system = load_compact_system(lines)
+    compact_system_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(compact_system) == 1 + 200 * 4
+    assert compact_system_memory * 5 < system_memory
+    assert {d.path: d.size for d in compact_system.traverse_directories()} == {
+        d.path: d.size for d in system.traverse_directories()
+    }
+    assert compact_system.find_directory("żółw", compact_system.find_directory("top7", ROOT_ID)) == 201 + 3 * 7 + 2
+    rebuilt = CompactSystem.from_arrays(compact_system.parents, compact_system.own_sizes, compact_system.names)
+    assert rebuilt.find_directory("tmp", rebuilt.find_directory("top199", ROOT_ID)) == len(compact_system) - 2
+
+
+def test_compact_system_ignores_repeated_listings():
+    lines = TEST_INPUT.splitlines() + ["$ cd /", "$ ls", "dir a", "14848514 b.txt"]
+    compact_system = load_compact_system(lines)
+
+    assert compact_system.get_used_space() == load_system(TEST_INPUT.splitlines()).get_used_space()
+    assert len(compact_system) == 4
+
+
+def test_repeated_listings_through_handlers():
+    lines = ["$ cd /", "$ ls", "10 a", "$ ls", "10 a", "dir b", "$ cd b", "$ ls", "5 c", "$ cd ..", "$ ls"]
+    lines += ["10 a", "dir b"]
+    system = load_system(lines)
+    compact_system = load_system(lines, CompactSystem())
+
+    assert system.get_used_space() == compact_system.get_used_space() == load_compact_system(lines).get_used_space()
+    assert compact_system.get_used_space() == 15
+
+    lines = TEST_INPUT.splitlines() + ["$ cd ..", "$ ls", "dir a", "14848514 b.txt", "8504156 c.dat", "dir d"]
+    system = load_system(lines)
+    assert system.get_used_space() == load_system(lines, CompactSystem()).get_used_space() == 48381165
+    assert {d.path: d.size for d in system.traverse_directories()} == {
+        d.path: d.size for d in load_system(TEST_INPUT.splitlines()).traverse_directories()
+    }
+
+
+def test_deep_directory_tree():
+    depth = 50000
+    system = System()
+    system.change_directory("/")
+    for i in range(depth):
+        system.current_directory.add_file("f", 1)
+        system.change_directory(f"d{i}")
+
+    directories = list(system.traverse_directories())
+    assert len(directories) == depth + 1
+    assert [d.size for d in directories[:3]] == [depth, depth - 1, depth - 2]
+    assert system.current_directory.path == "root/" + "/".join(f"d{i}" for i in range(depth))
+
+
+def test_size_index_queries():
+    system = load_system(TEST_INPUT.splitlines())
+    index = SizeIndex.from_system(system)
+
+    assert index.sizes == [584, 94853, 24933642, 48381165]
+    assert index.used_space == system.get_used_space()
+    assert index.get_total_size_at_most(MAX_DIR_SIZE) == ANSWER_PART_1
+    assert index.count_directories_at_most(MAX_DIR_SIZE) == 2
+    assert index.find_directory_to_delete().size == ANSWER_PART_2
+    assert index.find_directory_to_delete(total_disk_space=50000000).path == "/"
+    assert index.find_directory_to_delete(total_disk_space=10000000) is None
+    assert index.get_smallest_size_at_least(585) == 94853
+    assert index.get_total_size_at_most(583) == 0
+
+
+def test_size_index_over_compact_system():
+    index = SizeIndex.from_system(load_compact_system(TEST_INPUT.splitlines()))
+
+    assert index.get_total_size_at_most(MAX_DIR_SIZE) == ANSWER_PART_1
+    assert index.find_directory_to_delete().size == ANSWER_PART_2
+
+
+def test_live_system_answers_while_streaming():
+    system = LiveSystem()
+    lines = TEST_INPUT.splitlines()
+    system.feed(lines[:4])  # root listing is not finished yet
+
+    assert system.get_used_space() == 14848514
+    assert system.find_directory_to_delete().path == "root/a"  # enough unused space, so the smallest one
+
+    system.feed(lines[4:])
+    assert system.get_used_space() == load_system(lines).get_used_space()
+    assert system.find_directory_to_delete().size == ANSWER_PART_2
+    assert [d.size for d in system.traverse_directories()] == [48381165, 94853, 584, 24933642]
+
+    directory_a = system.root.find_directory("a")
+    system.feed(["$ cd ..", "$ ls", "dir a", "14848514 b.txt"])  # listed again, so the existing directory is kept
+    assert system.root.add_directory("a") is directory_a
+    assert directory_a.size == 94853 and system.get_used_space() == 48381165
+    system.root.find_directory("d").add_file("l", 10000000)  # index is rebuilt after changes
+    assert system.find_directory_to_delete() is system.root.find_directory("d")
+    assert system.find_directory_to_delete().size == ANSWER_PART_2 + 10000000
+
+
+def test_live_system_scales_like_batch_parsing():
+    lines = ["$ cd /", "$ ls"] + [f"dir d{i}" for i in range(20000)]
+    for i in range(20000):
+        lines += [f"$ cd d{i}", "$ ls", f"{i + 1} f", "dir e", "$ cd e", "$ ls", "7 g", "$ cd ..", "$ cd .."]
+
+    start = time.perf_counter()
+    load_system(lines)
+    batch_time = time.perf_counter() - start
+
+    system = LiveSystem()
+    start = time.perf_counter()
+    for line_idx in range(0, len(lines), 1000):
+        system.feed(lines[line_idx : line_idx + 1000])
+    system.find_directory_to_delete()
+    live_time = time.perf_counter() - start
+
+    assert system.get_used_space() == sum(range(1, 20001)) + 7 * 20000
+    assert live_time < 5 * batch_time + 0.1
+
+
+def test_transcript_follower_reads_only_appended_lines(tmp_path):
+    path = tmp_path / "input.txt"
+    data = TEST_INPUT.encode()
+    split_at = data.index(b"29116 f") + 3  # in the middle of a line
+
+    path.write_bytes(data[:split_at])
+    follower = TranscriptFollower(path)
+    follower.update()
+    assert follower.system.get_used_space() == 14848514 + 8504156
+
+    with open(path, "ab") as f:
+        f.write(data[split_at:])
+    follower.update()
+    assert follower.system.get_used_space() == 48381165 - 7214296  # last line is not terminated yet
+
+    follower.finish()
+    assert follower.system.get_used_space() == 48381165
+    assert follower.offset == len(data)
+
+
+def make_directory_tree(path, system):
+    """Create real directories and (sparse) files matching the directory tree of the system."""
+    stack = [(system.root, path)]
+    while stack:
+        directory, directory_path = stack.pop()
+        directory_path.mkdir(exist_ok=True)
+        for name, size in directory.files.items():
+            with open(directory_path / name, "wb") as f:
+                f.truncate(size)
+        stack.extend((child, directory_path / child.name) for child in directory.child_directories)
+
+
+def test_load_system_from_filesystem(tmp_path):
+    expected_system = load_system(TEST_INPUT.splitlines())
+    make_directory_tree(tmp_path, expected_system)
+
+    system = load_system_from_filesystem(tmp_path, max_workers=2)
+
+    assert {d.path: d.size for d in system.traverse_directories()} == {
+        d.path: d.size for d in expected_system.traverse_directories()
+    }
+    assert load_system(generate_transcript(system)).get_used_space() == system.get_used_space()
+
+
+def test_load_system_from_filesystem_symlinks(tmp_path):
+    (tmp_path / "a").mkdir()
+    with open(tmp_path / "a" / "f", "wb") as f:
+        f.truncate(10)
+    (tmp_path / "a" / "loop").symlink_to(tmp_path)
+    (tmp_path / "link").symlink_to(tmp_path / "a" / "f")
+
+    assert load_system_from_filesystem(tmp_path).get_used_space() == 10
+    assert load_system_from_filesystem(tmp_path, skip_symlinks=False).get_used_space() == 20
+
+
+def test_snapshot_round_trip(tmp_path):
+    system = load_compact_system(TEST_INPUT.splitlines())
+    save_snapshot(system, tmp_path / "tree.snapshot", b"x" * 32)
+
+    loaded = load_snapshot(tmp_path / "tree.snapshot", b"x" * 32)
+    assert list(loaded.parents) == list(system.parents)
+    assert list(loaded.sizes) == list(system.sizes)
+    assert loaded.names == system.names
+    assert loaded.find_directory("a", directory_id=0) == system.find_directory("a", directory_id=0)
+    assert min(d.size for d in find_directories(loaded)) == ANSWER_PART_2
+    assert load_snapshot(tmp_path / "tree.snapshot", b"y" * 32) is None
+    assert load_snapshot(tmp_path / "missing.snapshot") is None
+
+    data = bytearray((tmp_path / "tree.snapshot").read_bytes())
+    name_ids_offset = HEADER.size + 3 * 8 * len(system)
+    data[name_ids_offset : name_ids_offset + 4] = (999).to_bytes(4, "little")  # corrupted name id
+    (tmp_path / "corrupted.snapshot").write_bytes(bytes(data))
+    assert load_snapshot(tmp_path / "corrupted.snapshot") is None
+
+    for directory_id, parent_id in [(1, 3), (1, 1), (2, 999), (0, 0)]:
+        data = bytearray((tmp_path / "tree.snapshot").read_bytes())
+        parent_offset = HEADER.size + 8 * directory_id
+        data[parent_offset : parent_offset + 8] = parent_id.to_bytes(8, "little")  # corrupted parent id
+        (tmp_path / "corrupted.snapshot").write_bytes(bytes(data))
+        assert load_snapshot(tmp_path / "corrupted.snapshot") is None
+
+
+def test_cached_system_is_rebuilt_when_transcript_changes(tmp_path):
+    transcript = tmp_path / "input.txt"
+    transcript.write_text(TEST_INPUT)
+
+    assert load_compact_system_cached(transcript).get_used_space() == 48381165
+    snapshot = tmp_path / "input.txt.snapshot"
+    assert load_snapshot(snapshot, get_transcript_hash(transcript)) is not None
+    assert load_compact_system_cached(transcript).get_used_space() == 48381165
+
+    transcript.write_text(TEST_INPUT + "\n1 extra")
+    assert load_snapshot(snapshot, get_transcript_hash(transcript)) is None
+    assert load_compact_system_cached(transcript).get_used_space() == 48381166
+
+
+def test_tree_representation():
+    root = load_system(TEST_INPUT.splitlines()).root
+
+    assert root.tree_representation().splitlines()[:4] == [
+        " - / (dir):",
+        "\t - a (dir):",
+        "\t\t - e (dir):",
+        "\t\t\t - i (file, size=584)",
+    ]
+    assert len(root.tree_representation().splitlines()) == 14
+    assert len(root.tree_representation(max_depth=1).splitlines()) == 12
+    assert root.tree_representation(max_depth=0).splitlines() == [
+        " - / (dir):",
+        "\t - b.txt (file, size=14848514)",
+        "\t - c.dat (file, size=8504156)",
+    ]
+
+
+def test_largest_directories_report():
+    system = load_system(TEST_INPUT.splitlines())
+
+    assert [d.size for d in find_largest_directories(system, 2)] == [48381165, 24933642]
+    assert len(find_largest_directories(load_compact_system(TEST_INPUT.splitlines()), 10)) == 4
+
+    output = io.StringIO()
+    write_largest_directories_report(system, output, n=3)
+    assert output.getvalue() == "48381165\t/\n24933642\troot/d\n   94853\troot/a\n"
@@ -43,7 +43,12 @@ Consider your map; how many trees are visible from outside the grid?
 
 https://adventofcode.com/2022/day/8
 """
-from typing import List
+from typing import List, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy backend is optional, pure Python engine is used without it
+    np = None
 
 
 def is_visible_from_top(row_idx: int, col_idx: int, grid: List[List[int]]) -> bool:
@@ -78,32 +83,110 @@ def is_visible_from_right(row_idx: int, col_idx: int, grid: List[List[int]]) ->
     return (max(trees_on_right) < grid[row_idx][col_idx]) if trees_on_right else True
 
 
-def count_visible_trees(grid: List[List[int]]) -> int:
-    """Count how many trees are visible from outside the grid (from at least one direction).
+def get_visibility_mask(grid: List[List[int]]) -> List[List[bool]]:
+    """Mark every tree that is visible from at least one edge of the grid.
 
-    A tree is "visible" if there aren't any trees between it and the edge that are higher or of the same height. Trees
-    on the edges are always visible.
+    Instead of checking each tree against all trees between it and every edge, the grid is swept four times (from the
+    top, bottom, left and right edge) while keeping the running maximum of trees seen so far in each line. A tree is
+    visible from the sweep's edge if it is higher than that maximum. Whole mask is computed in O(rows * columns).
     """
-    n_visible_trees = 0
+    n_rows = len(grid)
+    n_cols = len(grid[0]) if grid else 0
+    mask = [[False] * n_cols for _ in range(n_rows)]
+
+    for row_idx in range(n_rows):
+        row = grid[row_idx]
+        mask_row = mask[row_idx]
+
+        highest = -1
+        for col_idx in range(n_cols):  # from the left edge
+            if row[col_idx] > highest:
+                highest = row[col_idx]
+                mask_row[col_idx] = True
+
+        highest = -1
+        for col_idx in reversed(range(n_cols)):  # from the right edge
+            if row[col_idx] > highest:
+                highest = row[col_idx]
+                mask_row[col_idx] = True
+
+    # Vertical sweeps keep one running maximum per column, so the grid is still read row by row
+    highest_in_cols = [-1] * n_cols
+    for row_idx in range(n_rows):  # from the top edge
+        row = grid[row_idx]
+        mask_row = mask[row_idx]
+        for col_idx in range(n_cols):
+            if row[col_idx] > highest_in_cols[col_idx]:
+                highest_in_cols[col_idx] = row[col_idx]
+                mask_row[col_idx] = True
+
+    highest_in_cols = [-1] * n_cols
+    for row_idx in reversed(range(n_rows)):  # from the bottom edge
+        row = grid[row_idx]
+        mask_row = mask[row_idx]
+        for col_idx in range(n_cols):
+            if row[col_idx] > highest_in_cols[col_idx]:
+                highest_in_cols[col_idx] = row[col_idx]
+                mask_row[col_idx] = True
+
+    return mask
+
+
+def load_grid_array(data: Union[bytes, str]) -> "np.ndarray":
+    """Load the map straight into a 2D ``uint8`` array, without building a Python list for every row.
+
+    Every line of the map must have the same length. Digits are converted to heights by subtracting the ASCII code of
+    "0" from the raw bytes.
+    """
+    if isinstance(data, str):
+        data = data.encode("ascii")
+    data = data.rstrip(b"\n") + b"\n"
+    width = data.index(b"\n")
+    raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, width + 1)
+    return raw[:, :width] - ord("0")  # drop newline characters
+
 
-    for row_idx, row in enumerate(grid):
-        for col_idx, col in enumerate(row):
-            is_visible = (
-                is_visible_from_top(row_idx, col_idx, grid)
-                or is_visible_from_bottom(row_idx, col_idx, grid)
-                or is_visible_from_left(row_idx, col_idx, grid)
-                or is_visible_from_right(row_idx, col_idx, grid)
-            )
-            n_visible_trees += is_visible  # True is 1, False is 0
+def get_visibility_mask_array(grid: "np.ndarray") -> "np.ndarray":
+    """Vectorized version of ``get_visibility_mask`` for grids stored as NumPy arrays.
 
-    return n_visible_trees
+    Running maximum from every edge is computed with ``np.maximum.accumulate`` on the grid and its flipped views. A tree
+    is visible from an edge if it is higher than the running maximum of the trees before it.
+    """
+    mask = np.zeros(grid.shape, dtype=bool)
+    if grid.size == 0:
+        return mask
+
+    for view, mask_view in (
+        (grid, mask),  # from the left edge
+        (grid[:, ::-1], mask[:, ::-1]),  # from the right edge
+        (grid.T, mask.T),  # from the top edge
+        (grid.T[:, ::-1], mask.T[:, ::-1]),  # from the bottom edge
+    ):
+        highest = np.maximum.accumulate(view, axis=1)
+        mask_view[:, 0] = True
+        mask_view[:, 1:] |= view[:, 1:] > highest[:, :-1]
+    return mask
+
+
+def count_visible_trees(grid: Union[List[List[int]], "np.ndarray"]) -> int:
+    """Count how many trees are visible from outside the grid (from at least one direction).
+
+    A tree is "visible" if there aren't any trees between it and the edge that are higher or of the same height. Trees
+    on the edges are always visible. Grids stored as NumPy arrays are handled by the vectorized engine.
+    """
+    if np is not None and isinstance(grid, np.ndarray):
+        return int(get_visibility_mask_array(grid).sum())
+    return sum(sum(mask_row) for mask_row in get_visibility_mask(grid))  # True is 1, False is 0
 
 
 def main() -> int:
     grid = []
     with open("input.txt", "r") as f:
-        for line in f.readlines():
-            grid.append(list(map(int, line.strip())))
+        if np is not None:
+            grid = load_grid_array(f.read())
+        else:
+            for line in f.readlines():
+                grid.append(list(map(int, line.strip())))
 
     result = count_visible_trees(grid)
     print(f"Result: {result}")
@@ -47,7 +47,15 @@ Consider each tree on your map. What is the highest scenic score possible for an
 
 https://adventofcode.com/2022/day/8#part2
 """
-from typing import List
+from typing import List, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy backend is optional, pure Python engine is used without it
+    np = None
+
+# Trees have heights from 0 to 9
+MAX_TREE_HEIGHT = 9
 
 
 def get_line_score(tree: int, other_trees: List[int]) -> int:
@@ -100,23 +108,119 @@ def calculate_scenic_score(row_idx: int, col_idx: int, grid: List[List[int]]) ->
     )
 
 
-def find_highest_scenic_score(grid: List[List[int]]) -> int:
-    """Calculate scenic score for each tree and find the highest one"""
-    max_score = 0
+def get_viewing_distances(trees: List[int]) -> List[int]:
+    """
+    Calculate viewing distance towards the beginning of a tree line for every tree in it, in a single pass.
+
+    Monotonic stack keeps positions of trees that can still block the view of the next ones (their heights decrease
+    from the bottom to the top of the stack). Lower trees are popped, because a tree of the same height or higher
+    stands between them and any following tree. Every position is pushed and popped at most once.
+    """
+    distances = []
+    blocking_trees: List[int] = []  # positions of trees, from the furthest to the nearest
+
+    for position, tree in enumerate(trees):
+        while blocking_trees and trees[blocking_trees[-1]] < tree:
+            blocking_trees.pop()
+        # Without a blocking tree, the view reaches the edge (position 0)
+        distances.append(position - blocking_trees[-1] if blocking_trees else position)
+        blocking_trees.append(position)
+    return distances
+
+
+def get_scenic_scores(grid: List[List[int]]) -> List[List[int]]:
+    """Calculate scenic score of every tree in the grid in O(rows * columns).
+
+    Viewing distances are computed with one monotonic stack pass per direction for each row and column, then
+    multiplied together.
+    """
+    n_rows = len(grid)
+    n_cols = len(grid[0]) if grid else 0
+    scores = [[1] * n_cols for _ in range(n_rows)]
 
     for row_idx, row in enumerate(grid):
-        for col_idx, col in enumerate(row):
-            score = calculate_scenic_score(row_idx, col_idx, grid)
-            if score > max_score:
-                max_score = score
-    return max_score
+        scores_row = scores[row_idx]
+        to_left = get_viewing_distances(row)
+        to_right = get_viewing_distances(row[::-1])[::-1]
+        for col_idx in range(n_cols):
+            scores_row[col_idx] = to_left[col_idx] * to_right[col_idx]
+
+    for col_idx in range(n_cols):
+        col = [row[col_idx] for row in grid]
+        upwards = get_viewing_distances(col)
+        downwards = get_viewing_distances(col[::-1])[::-1]
+        for row_idx in range(n_rows):
+            scores[row_idx][col_idx] *= upwards[row_idx] * downwards[row_idx]
+
+    return scores
+
+
+def load_grid_array(data: Union[bytes, str]) -> "np.ndarray":
+    """Load the map straight into a 2D ``uint8`` array, without building a Python list for every row.
+
+    Every line of the map must have the same length. Digits are converted to heights by subtracting the ASCII code of
+    "0" from the raw bytes.
+    """
+    if isinstance(data, str):
+        data = data.encode("ascii")
+    data = data.rstrip(b"\n") + b"\n"
+    width = data.index(b"\n")
+    raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, width + 1)
+    return raw[:, :width] - ord("0")  # drop newline characters
+
+
+def get_viewing_distances_array(grid: "np.ndarray") -> "np.ndarray":
+    """Calculate viewing distance towards the left edge for every tree of a grid stored as a NumPy array.
+
+    Heights are limited to 0-9, so for every height ``h`` the position of the last tree of height ``h`` or higher is
+    tracked with ``np.maximum.accumulate``. Viewing distance of a tree of height ``h`` is the distance to that position
+    (or to the edge, which is position 0).
+    """
+    n_cols = grid.shape[1]
+    positions = np.broadcast_to(np.arange(n_cols, dtype=np.int64), grid.shape)
+    distances = np.zeros(grid.shape, dtype=np.int64)
+    if n_cols < 2:
+        return distances
+
+    for height in range(MAX_TREE_HEIGHT + 1):
+        is_tree_of_height = grid[:, 1:] == height
+        if not is_tree_of_height.any():
+            continue
+        blocking_positions = np.maximum.accumulate(np.where(grid >= height, positions, 0), axis=1)
+        # Blocking tree must be located before the investigated one, so positions are shifted by one
+        view = positions[:, 1:] - blocking_positions[:, :-1]
+        distances[:, 1:][is_tree_of_height] = view[is_tree_of_height]
+    return distances
+
+
+def get_scenic_scores_array(grid: "np.ndarray") -> "np.ndarray":
+    """Vectorized version of ``get_scenic_scores`` for grids stored as NumPy arrays."""
+    return (
+        get_viewing_distances_array(grid)  # to the left
+        * get_viewing_distances_array(grid[:, ::-1])[:, ::-1]  # to the right
+        * get_viewing_distances_array(grid.T).T  # upwards
+        * get_viewing_distances_array(grid.T[:, ::-1])[:, ::-1].T  # downwards
+    )
+
+
+def find_highest_scenic_score(grid: Union[List[List[int]], "np.ndarray"]) -> int:
+    """Calculate scenic score for each tree and find the highest one.
+
+    Grids stored as NumPy arrays are handled by the vectorized engine.
+    """
+    if np is not None and isinstance(grid, np.ndarray):
+        return int(get_scenic_scores_array(grid).max(initial=0))
+    return max((max(scores_row) for scores_row in get_scenic_scores(grid)), default=0)
 
 
 def main() -> int:
     grid = []
     with open("input.txt", "r") as f:
-        for line in f.readlines():
-            grid.append(list(map(int, line.strip())))
+        if np is not None:
+            grid = load_grid_array(f.read())
+        else:
+            for line in f.readlines():
+                grid.append(list(map(int, line.strip())))
 
     result = find_highest_scenic_score(grid)
     print(f"Result: {result}")
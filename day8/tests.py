@@ -1,6 +1,19 @@
+import random
 from unittest.mock import mock_open, patch
 
+import pytest
+
+from .main_part_1 import (
+    count_visible_trees,
+    get_visibility_mask,
+    is_visible_from_bottom,
+    is_visible_from_left,
+    is_visible_from_right,
+    is_visible_from_top,
+    load_grid_array,
+)
 from .main_part_1 import main as main_1
+from .main_part_2 import calculate_scenic_score, find_highest_scenic_score, get_scenic_scores
 from .main_part_2 import main as main_2
 
 TEST_INPUT = """
@@ -29,3 +42,40 @@ def test_part_2(mock_file):
 
     mock_file.assert_called_with("input.txt", "r")
     assert result == ANSWER_PART_2
+
+
+def test_visibility_mask_matches_per_tree_checks():
+    grid = [list(map(int, line)) for line in TEST_INPUT.splitlines()]
+    mask = get_visibility_mask(grid)
+
+    for row_idx, row in enumerate(grid):
+        for col_idx, _ in enumerate(row):
+            expected = (
+                is_visible_from_top(row_idx, col_idx, grid)
+                or is_visible_from_bottom(row_idx, col_idx, grid)
+                or is_visible_from_left(row_idx, col_idx, grid)
+                or is_visible_from_right(row_idx, col_idx, grid)
+            )
+            assert mask[row_idx][col_idx] == expected
+
+
+def test_scenic_scores_match_per_tree_calculation():
+    grid = [list(map(int, line)) for line in TEST_INPUT.splitlines()]
+    scores = get_scenic_scores(grid)
+
+    for row_idx, row in enumerate(grid):
+        for col_idx, _ in enumerate(row):
+            assert scores[row_idx][col_idx] == calculate_scenic_score(row_idx, col_idx, grid)
+
+
+def test_numpy_backend_matches_python_engines():
+    pytest.importorskip("numpy")
+    rng = random.Random(8)
+    for n_rows, n_cols in [(1, 1), (1, 7), (7, 1), (20, 30)]:
+        lines = ["".join(str(rng.randint(0, 9)) for _ in range(n_cols)) for _ in range(n_rows)]
+        grid = [list(map(int, line)) for line in lines]
+        grid_array = load_grid_array("\n".join(lines).encode())
+
+        assert grid_array.tolist() == grid
+        assert count_visible_trees(grid_array) == count_visible_trees(grid)
+        assert find_highest_scenic_score(grid_array) == find_highest_scenic_score(grid)